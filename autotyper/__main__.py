@@ -0,0 +1,7 @@
+# autotyper/__main__.py
+# Lets the headless CLI run as `python -m autotyper`.
+import sys
+
+from .cli import main
+
+sys.exit(main())
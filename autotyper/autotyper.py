@@ -1,223 +1,283 @@
 # autotyper/autotyper.py
-import time
-import random
-import requests
-import json
+from time import perf_counter
 import os
 import subprocess
 import sys
-from pynput.keyboard import Key, Controller
 from .settings import Settings
-from .constants import VERSION
+from .backends import PynputBackend, KEY_ENTER, KEY_BACKSPACE
+from .planner import KeystrokePlan, KeystrokePlanner, TYPE, TYPO, BACKSPACE, BREAK
+from .timing import DeadlineScheduler
+from .control import TypingControl
+from .eta import DelayModel, LiveEta
+from .keyboard_layouts import load_layout
+from .sources import ByteProgress
 
 class Autotyper:
-    def __init__(self, settings=None):
-        self.keyboard = Controller()
+    def __init__(self, settings=None, backend=None, clock=None, seed=None, use_numpy=None):
+        self.keyboard = backend or PynputBackend()  # See backends.py for null/recording backends
         self.vowels = "aeiouAEIOU"
         self.punctuation = ".?!,"
-        self.cancelled = False
+        self.control = TypingControl(clock)  # Pause/resume/cancel, shared with the GUI thread
         self.typing_speed = None
         self.settings = settings or Settings()
+        self.config = self.settings.snapshot()  # Typed settings used while typing
         self.keyboard_layout = self._create_keyboard_layout()
+        self.seed = seed  # Seed for every session (None picks a new one each session)
+        self.session_seed = seed  # Seed of the current/last session, to reproduce it
+        self.planner = KeystrokePlanner(self.get_nearby_char, self.vowels, self.punctuation, use_numpy, seed)
+        self.rng = self.planner.rng  # This session's own generator, never the global `random`
+        self.delay_model = DelayModel(self.vowels, self.punctuation)  # Expected time for the rest of the text
+        if clock is None:
+            self.scheduler = DeadlineScheduler(sleep=self.control.sleep)  # Keeps keystrokes on absolute deadlines
+        else:
+            # Injected clock (e.g. a VirtualClock to simulate a session), every wait goes through it
+            self.scheduler = DeadlineScheduler(clock=clock, sleep=clock.sleep)
+        self.breaks_taken = 0
         self.chars_typed_since_break = 0
+        self.instrumentation = None  # Set to an Instrumentation to time every keystroke
         self.repo_owner = "AngelosGamePlay"
         self.repo_name = "autotyper"
-        self.master = None
+        self._updates = None  # UpdateChecker, see the updates property
         self.total_delay = 0  # Store the total expected delay
-        self.start_time = 0   # Store the typing start time
-        self.paused = False  # Track paused state
-        self.text_typed_so_far = "" #Store the text already typed
+        self.start_time = 0   # Store the typing start time (on the scheduler's clock)
+        self.paused_before_start = 0.0  # control.paused_time() at start_time
+        self.planned_elapsed = 0.0  # Planned delay up to the current deadline
+        self.live_eta = LiveEta()  # Learns the real pace while typing
+        self.position = 0  # How many characters of the text have been typed
+        self.source = None  # The TextSource being typed by start_typing_stream
+        self.source_model = DelayModel(self.vowels, self.punctuation)  # Everything read from the source
+        self.stream_text = ""  # The source chunk being typed
+        self.stream_offset = 0  # Position of stream_text in the whole source
 
 
     def _create_keyboard_layout(self):
-        """Creates a dictionary representing the QWERTY keyboard layout."""
-        layout = {
-            'q': 'wa', 'w': 'qase', 'e': 'wsdr', 'r': 'edft', 't': 'rfgy', 'y': 'tghu',
-            'u': 'yhji', 'i': 'ujko', 'o': 'iklp', 'p': 'ol',
-            'a': 'qwsz', 's': 'awedxz', 'd': 'swerfcx', 'f': 'dertgv', 'g': 'frthvb',
-            'h': 'gtyjbn', 'j': 'huyknm', 'k': 'jiolm', 'l': 'kop',
-            'z': 'asx', 'x': 'zsdc', 'c': 'xdfv', 'v': 'cfgb', 'b': 'vghn', 'n': 'bhjm',
-            'm': 'njk',
-            '1': '2q', '2': '13wq', '3': '24ew', '4': '35re', '5': '46tr', '6': '57ty',
-            '7': '68uy', '8': '79iu', '9': '80oi', '0': '9p',
-            '-': '0p', '=': '-',
-            '`': '1', '~': '`1', '!': '`12q', '@':'123wq', '#':'234ew', '$':'345re',
-            '%': '456tr', '^':'567ty', '&':'678uy', '*':'789iu', '(':'890oi', ')':'90p',
-            '_':'-0p', '+':'-=',
-            ',': 'ml', '.': ',m', '/': '.',
-            ' ': 'cvbnm'  # Spacebar neighbors
-        }
-        #Add uppercase
-        uppercase_layout = {}
-        for char, neighbors in layout.items():
-            uppercase_layout[char.upper()] = neighbors.upper()
-        layout.update(uppercase_layout) # Merge
-        return layout
+        """Returns the compiled KeyboardLayout chosen in the settings (see keyboard_layouts.py)."""
+        return load_layout(self.config.keyboard_layout)
 
     def get_nearby_char(self, char):
         """Returns a random neighboring character or the original character."""
-        try:
-            neighbors = self.keyboard_layout.get(char)
-            if neighbors:
-                return random.choice(neighbors)
-            else:
-                return char
-        except Exception:
-            return 'x'
+        return self.keyboard_layout.nearby(char, self.rng)
 
     def calculate_typing_speed(self, wpm):
         chars_per_minute = wpm * 6
         self.typing_speed = 60 / chars_per_minute
 
-    def type_like_human(self, text, progress_var):
-        """Types the given text, updating progress_var."""
+    def type_like_human(self, text, progress=None):
+        """Types the given text, publishing progress to a ProgressChannel (if given)."""
         if self.typing_speed is None:
             raise ValueError("Typing speed not set.  Call calculate_typing_speed first.")
 
-        total_chars = len(text)
-        chars_typed = 0
-
-        for i, char in enumerate(text):
-            if self.cancelled:
+        self.execute_plan(self.plan_chunks(text), text, progress)
+
+    def plan_keystrokes(self, text, start=0):
+        """Compiles text (from start) into one KeystrokePlan at the current typing speed."""
+        return self.planner.plan(text, self.typing_speed, self.config, start, self.chars_typed_since_break)
+
+    def plan_chunks(self, text, start=0):
+        """Lazily compiles text (from start) into KeystrokePlan chunks at the current typing speed."""
+        return self.planner.plan_chunks(text, self.typing_speed, self.config, start, self.chars_typed_since_break)
+
+    def plan_stream(self, chunks, text="", offset=0, start=0):
+        """Lazily compiles an iterator of text chunks into KeystrokePlan chunks, positioned in the whole stream."""
+        # text, offset and start continue a partly typed chunk first (when re-planning)
+        while True:
+            self.stream_text = text
+            self.stream_offset = offset
+            for plan in self.plan_chunks(text, start):
+                plan.start += offset
+                plan.end += offset
+                yield plan
+            offset += len(text)
+            start = 0
+            text = next(chunks, None)
+            if text is None:
                 return
-
-            # --- Pause Handling ---
-            while self.paused:
-                time.sleep(0.1)  # Check frequently, but don't busy-wait
-
-            current_speed = random.uniform(self.typing_speed * 0.8, self.typing_speed * 1.2)
-
-            if char == '\n':
-                self.keyboard.press(Key.enter)
-                self.keyboard.release(Key.enter)
-                time.sleep(random.uniform(self.settings.get_setting('Typing', 'word_pause_min') * (self.typing_speed / 0.1),
-                                        self.settings.get_setting('Typing', 'word_pause_max') * (self.typing_speed / 0.1)))
-                chars_typed += 1  # Count newline as a character
-                progress_var.set(int((chars_typed / total_chars) * 100))
-                if self.master:
-                    self.master.update() # Force GUI Update
-                continue
-
-            error_rate = (self.settings.get_setting('Typing', 'vowel_error_rate')
-                          if char in self.vowels else
-                          self.settings.get_setting('Typing', 'consonant_error_rate'))
-
-            if random.random() < error_rate:
-                wrong_char = self.get_nearby_char(char)
-                self.keyboard.press(wrong_char)
-                self.keyboard.release(wrong_char)
-                time.sleep(random.uniform(self.settings.get_setting('Typing', 'wrong_char_delay_min'),
-                                        self.settings.get_setting('Typing', 'wrong_char_delay_max')))
-
-                self.keyboard.press(Key.backspace)
-                self.keyboard.release(Key.backspace)
-                time.sleep(random.uniform(self.settings.get_setting('Typing', 'backspace_delay_min') * (self.typing_speed / 0.1),
-                                        self.settings.get_setting('Typing', 'backspace_delay_max') * (self.typing_speed / 0.1)))
-
-                self.keyboard.press(char)
-                self.keyboard.release(char)
-            else:
-                self.keyboard.press(char)
-                self.keyboard.release(char)
-
-            if char != ' ' and char not in self.punctuation and char != '\n':
-                time.sleep(current_speed)
-
-            if char == ' ':
-                time.sleep(random.uniform(self.settings.get_setting('Typing', 'word_pause_min') * (self.typing_speed / 0.1),
-                                        self.settings.get_setting('Typing', 'word_pause_max') * (self.typing_speed / 0.1)))
-            elif char in self.punctuation:
-                time.sleep(random.uniform(self.settings.get_setting('Typing', 'punctuation_pause_min') * (self.typing_speed / 0.1),
-                                        self.settings.get_setting('Typing', 'punctuation_pause_max') * (self.typing_speed / 0.1)))
-
-            self.chars_typed_since_break += 1
-            if self.chars_typed_since_break >= self.settings.get_setting('Typing', 'break_frequency'):
-                self.take_break()
-
-            chars_typed += 1
-            progress_var.set(int((chars_typed / total_chars) * 100))
-            if self.master:
-                self.master.update()  # Force GUI update *inside* the loop
-
-            # Accumulate the typed text
-            self.text_typed_so_far += char
-
-
-    def take_break(self):
-        duration = random.uniform(self.settings.get_setting('Typing', 'break_duration_min'),
-                                  self.settings.get_setting('Typing', 'break_duration_max'))
-        time.sleep(duration)
-        self.chars_typed_since_break = 0
-
-    def start_typing(self, text, delay, wpm, progress_var):
-        self.cancelled = False
-        self.paused = False # Reset paused flag
+            self.delay_model.add(text)
+            self.source_model.add(text)
+
+    def execute_plan(self, plan, text, progress=None, replan=None):
+        """Types a KeystrokePlan (or an iterable of plan chunks) on absolute deadlines, publishing progress."""
+        # replan(position) supplies new chunks when the settings or WPM change (text can be None with it)
+        if replan is None:
+            replan = lambda position: self.plan_chunks(text, position)
+        chunks = iter((plan,)) if isinstance(plan, KeystrokePlan) else iter(plan)
+        chunk = next(chunks, None)
+        total_chars = len(text) if text is not None else 0
+        self.position = chunk.start if chunk is not None else total_chars
+        scheduler = self.scheduler
+        scheduler.spin_budget = self.config.spin_budget if self.config.precise_timing else 0.0
+        consume = self.delay_model.consume
+        tap = self.keyboard.tap
+        instrumentation = self.instrumentation
+        scheduler.start()
+
+        while chunk is not None:
+            actions = chunk.actions
+            keys = chunk.keys
+            delays = chunk.delays
+
+            for i in range(len(actions)):
+                action = actions[i]
+
+                # A typo and its backspace are never split by a re-plan
+                if action != BACKSPACE:
+                    # --- Pause Handling ---
+                    if self.paused and not self._wait_out_pause():
+                        return
+                    if self.cancelled:
+                        return
+                    if self.typing_speed != chunk.typing_speed or self.config is not chunk.config:
+                        # WPM or settings changed (e.g. config.ini was edited), re-plan the rest of the text
+                        scheduler.spin_budget = self.config.spin_budget if self.config.precise_timing else 0.0
+                        chunks = replan(self.position)
+                        break
+
+                if instrumentation is not None:
+                    started = perf_counter()
+                if action == BACKSPACE:
+                    tap(KEY_BACKSPACE)
+                elif action != BREAK:
+                    key = chr(keys[i])
+                    tap(KEY_ENTER if key == '\n' else key)
+                if instrumentation is not None:
+                    injected = perf_counter()
+
+                delay = delays[i]
+                self.planned_elapsed += delay
+                waited = scheduler.wait(delay)
+                while not waited:
+                    # Paused or cancelled mid-wait (e.g. during a break)
+                    if not self._wait_out_pause():
+                        if action == TYPO:
+                            # Don't leave the typo behind
+                            tap(KEY_BACKSPACE)
+                        return
+                    waited = scheduler.wait_pending()
+                if instrumentation is not None:
+                    waited_at = perf_counter()
+
+                if action == TYPE:
+                    if key != '\n':
+                        self.chars_typed_since_break += 1
+                    self.position += 1
+                    consume(key)
+                    if progress is not None:
+                        progress.publish(self.position, total_chars)
+                elif action == BREAK:
+                    self.chars_typed_since_break = 0
+                    self.breaks_taken += 1
+
+                if instrumentation is not None:
+                    instrumentation.record(injected - started, waited_at - injected,
+                                           perf_counter() - waited_at, scheduler.last_error)
+
+            chunk = next(chunks, None)
+
+    def _wait_out_pause(self):
+        """Blocks while paused, keeping the schedule in step. Returns False if cancelled."""
+        scheduler = self.scheduler
+        paused_at = scheduler.clock()
+        if not self.control.wait_while_paused():
+            return False
+        paused_for = scheduler.clock() - paused_at
+        scheduler.shift(paused_for)  # Don't count the pause as lateness
+        return True
+
+    def start_typing(self, text, delay, wpm, progress=None):
+        self.source = None
+        self.delay_model.count(text)
+        if not self._start_session(delay, wpm):
+            return
+        self.type_like_human(text, progress)
+
+    def start_typing_stream(self, source, delay, wpm, progress=None):
+        """Types text from an iterable of str chunks (e.g. a TextSource) as it is read, in constant memory."""
+        self.source = source if hasattr(source, 'total_bytes') else None
+        self.delay_model.count("")
+        self.source_model.count("")
+        if not self._start_session(delay, wpm):
+            return
+        if progress is not None and self.source is not None:
+            progress = ByteProgress(progress, self.source)
+        chunks = iter(source)
+        self.execute_plan(self.plan_stream(chunks), None, progress,
+                          lambda position: self.plan_stream(chunks, self.stream_text, self.stream_offset,
+                                                            position - self.stream_offset))
+
+    def _start_session(self, delay, wpm):
+        """Resets the state for a new session and waits out the start delay. Returns False if cancelled."""
+        self.control.reset()  # Reset paused and cancelled flags
         self.chars_typed_since_break = 0
+        self.config = self.settings.snapshot()
+        self.keyboard_layout = self._create_keyboard_layout()
         self.calculate_typing_speed(wpm)
-        self.total_delay = self.calculate_total_delay(text)  # Calculate *before* starting
-        self.start_time = time.time()  # Record the start time
-        self.text_typed_so_far = "" # Reset
-        time.sleep(delay)
-        self.type_like_human(text, progress_var)
+        self.session_seed = self.seed if self.seed is not None else self.rng.getrandbits(32)
+        self.planner.reseed(self.session_seed)  # Same seed, text and settings: same keystrokes
+        self.total_delay = self.estimate_remaining_delay()  # Calculate *before* starting
+        self.start_time = 0
+        self.position = 0
+        if delay and not self.scheduler.sleep(delay) and self.cancelled:
+            return False
+        self.planned_elapsed = 0.0
+        self.breaks_taken = 0
+        self.live_eta.reset()
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+        self.start_time = self.scheduler.clock()  # Record the start time
+        self.paused_before_start = self.control.paused_time()
+        return True
+
+    @property
+    def planner_kind(self):
+        """'numpy' or 'python': a seed only replays a session with the same kind of planner."""
+        return 'numpy' if self.planner.use_numpy else 'python'
 
     def cancel_typing(self):
-        self.cancelled = True
+        self.control.cancel()
+
+    @property
+    def paused(self):
+        return self.control.paused
+
+    @property
+    def cancelled(self):
+        return self.control.cancelled
 
     def update_settings(self):
-        pass
+        """Picks up changed settings; safe from any thread (e.g. the Settings.watch() callback)."""
+        self.config = self.settings.snapshot()
+        self.keyboard_layout = self._create_keyboard_layout()  # Cached by load_layout(), even when it fell back
+
+    @property
+    def updates(self):
+        """The UpdateChecker for latest release lookups, created (and updates.py loaded) on first use."""
+        if self._updates is None:
+            from .updates import UpdateChecker
+            self._updates = UpdateChecker(
+                f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/releases/latest")
+        return self._updates
 
     def get_latest_release_version(self):
-        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/releases/latest"
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            return data['tag_name']
-        except (requests.RequestException, KeyError, json.JSONDecodeError):
-            return None
+        return self.updates.latest_version()
 
     def is_update_available(self):
-        latest_version = self.get_latest_release_version()
-        if latest_version:
-            return latest_version > "v" + VERSION
-        return False
+        return self.updates.is_update_available()
 
-    def download_latest_installer(self):
+    def download_latest_installer(self, progress=None):
+        """Downloads (or resumes) the latest installer. Returns its path, or None on failure."""
         latest_version = self.get_latest_release_version()
         if not latest_version:
             print("Error: Couldn't retrieve latest release version.")
             return None
 
-        url = f"https://api.github.com/repos/{self.repo_owner}/{self.repo_name}/releases/latest"
+        from .updates import DownloadError
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            for asset in data['assets']:
-                if asset['name'].endswith('.exe'):
-                    download_url = asset['browser_download_url']
-                    break
-            else:
-                print("No installer found in latest release.")
-                return None
-
-            print(f"Downloading installer from: {download_url}")
-            installer_filename = f"AutotyperSetup-{latest_version}.exe"
-            response = requests.get(download_url, stream=True)
-            response.raise_for_status()
-
-            with open(installer_filename, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Same (cached) release info as the version check, not a second request
+            installer_path = self.updates.download_installer(progress=progress)
             print("Installer downloaded successfully.")
-            return installer_filename
-
-        except requests.RequestException as e:
-            print("Request error")
-            return None
-        except KeyError as e:
-            print("Key error")
+            return installer_path
+        except DownloadError as e:
+            print(e)
             return None
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
@@ -237,57 +297,44 @@ class Autotyper:
         else:
             print("Installer path is not valid.")
 
-    def calculate_total_delay(self, text):
-        """Calculates the *expected* total delay for typing the given text."""
-        total_delay = 0
-        chars_since_break = 0
-
-        for char in text:
-            # Typing speed delay (average)
-            total_delay += self.typing_speed
-
-            # Error delay (add delay if an error *would* occur)
-            error_rate = (self.settings.get_setting('Typing', 'vowel_error_rate')
-                          if char in self.vowels else
-                          self.settings.get_setting('Typing', 'consonant_error_rate'))
-            if random.random() < error_rate:
-                total_delay += (self.settings.get_setting('Typing', 'wrong_char_delay_min') +
-                                self.settings.get_setting('Typing', 'wrong_char_delay_max')) / 2  # Avg
-                total_delay += (self.settings.get_setting('Typing', 'backspace_delay_min') * (self.typing_speed / 0.1) +
-                                self.settings.get_setting('Typing', 'backspace_delay_max') * (self.typing_speed / 0.1)) / 2
-
-            # Word/punctuation pauses
-            if char == ' ':
-                total_delay += (self.settings.get_setting('Typing', 'word_pause_min') * (self.typing_speed / 0.1) +
-                                self.settings.get_setting('Typing', 'word_pause_max') * (self.typing_speed / 0.1)) / 2
-            elif char in self.punctuation:
-                total_delay += (self.settings.get_setting('Typing', 'punctuation_pause_min') * (self.typing_speed / 0.1) +
-                                self.settings.get_setting('Typing', 'punctuation_pause_max') * (self.typing_speed / 0.1)) / 2
-            elif char == '\n':
-                total_delay += (self.settings.get_setting('Typing', 'word_pause_min') * (self.typing_speed / 0.1) +
-                                self.settings.get_setting('Typing', 'word_pause_max') * (self.typing_speed / 0.1)) / 2
-
-            # Breaks
-            chars_since_break += 1
-            if chars_since_break >= self.settings.get_setting('Typing', 'break_frequency'):
-                total_delay += (self.settings.get_setting('Typing', 'break_duration_min') +
-                                self.settings.get_setting('Typing', 'break_duration_max')) / 2
-                chars_since_break = 0
-
-        return total_delay
+    def calculate_total_delay(self, text, start=0):
+        """Calculates the *expected* total delay for typing text[start:] (without slicing it)."""
+        model = DelayModel(self.vowels, self.punctuation)
+        model.count(text, start)
+        return model.estimate(self.config, self.typing_speed)[0]
+
+    def estimate_remaining_delay(self):
+        """Returns the expected delay for the part of the text not typed yet (O(1))."""
+        # The unread part of a TextSource is assumed to take as long per byte as what was read
+        remaining = self.delay_model.estimate(self.config, self.typing_speed)[0]
+        source = self.source
+        if source is not None and source.total_bytes and source.bytes_read:
+            unread = max(0, source.total_bytes - source.bytes_read)
+            remaining += self.source_model.estimate(self.config, self.typing_speed)[0] * unread / source.bytes_read
+        return remaining
+
+    def estimate_remaining_band(self, z=1.96):
+        """Returns a (low, high) confidence band for the remaining delay."""
+        return self.delay_model.band(self.config, self.typing_speed, z)
 
     def get_remaining_time(self):
-        """Estimates the remaining typing time."""
+        """Estimates the remaining typing time, adjusted to the pace observed so far (see LiveEta)."""
         if self.start_time == 0: # Not started
             return 0
-        elapsed_time = time.time() - self.start_time
-        remaining_time = self.total_delay - elapsed_time # Removed the adding of paused time
+        now = self.scheduler.clock()
+        # What is left of the current wait (e.g. a break in progress)
+        in_flight = 0.0 if self.paused else max(0.0, self.scheduler.deadline - now)
+        # Paused time as counted by pause()/resume() themselves, so it is right
+        # even before the typing thread has woken up from a pause
+        active_time = now - self.start_time - (self.control.paused_time() - self.paused_before_start)
+        self.live_eta.observe(active_time, self.planned_elapsed - in_flight)
+        remaining_time = self.live_eta.remaining(self.estimate_remaining_delay()) + in_flight
         return max(0, remaining_time)  # Ensure it doesn't go negative
 
     def pause_typing(self):
         """Pauses the typing process."""
-        self.paused = True
+        self.control.pause()
 
     def resume_typing(self):
         """Resumes the typing process."""
-        self.paused = False
\ No newline at end of file
+        self.control.resume()
\ No newline at end of file
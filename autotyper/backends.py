@@ -0,0 +1,99 @@
+# autotyper/backends.py
+import time
+
+# Special keys, named so they can't be mistaken for a typed character
+KEY_ENTER = 'enter'
+KEY_BACKSPACE = 'backspace'
+SPECIAL_KEYS = (KEY_ENTER, KEY_BACKSPACE)
+
+
+class KeyboardBackend:
+    """Where the typing engine sends its keystrokes.
+
+    A key is either a single character or one of SPECIAL_KEYS. Subclasses
+    implement press() and release(); tap() and type() are built on them.
+    """
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def release(self, key):
+        raise NotImplementedError
+
+    def tap(self, key):
+        """Presses and releases a key."""
+        self.press(key)
+        self.release(key)
+
+    def type(self, text):
+        """Taps every character of text, without any delay."""
+        for char in text:
+            self.tap(KEY_ENTER if char == '\n' else char)
+
+
+class PynputBackend(KeyboardBackend):
+    """Sends real keystrokes to the OS through pynput."""
+
+    def __init__(self):
+        # Imported here so the engine can be used without an input session
+        from pynput.keyboard import Key, Controller
+        self.controller = Controller()
+        self.special_keys = {KEY_ENTER: Key.enter, KEY_BACKSPACE: Key.backspace}
+
+    def press(self, key):
+        self.controller.press(self.special_keys.get(key, key))
+
+    def release(self, key):
+        self.controller.release(self.special_keys.get(key, key))
+
+    def tap(self, key):
+        key = self.special_keys.get(key, key)
+        self.controller.press(key)
+        self.controller.release(key)
+
+
+class NullBackend(KeyboardBackend):
+    """Discards every keystroke (for dry runs and measuring engine overhead)."""
+
+    def press(self, key):
+        pass
+
+    def release(self, key):
+        pass
+
+    def tap(self, key):
+        pass
+
+    def type(self, text):
+        pass
+
+
+class RecordingBackend(KeyboardBackend):
+    """Keeps every keystroke in memory as (timestamp, event, key).
+
+    event is 'press' or 'release'; timestamps come from `clock`
+    (time.monotonic by default).
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.events = []
+
+    def press(self, key):
+        self.events.append((self.clock(), 'press', key))
+
+    def release(self, key):
+        self.events.append((self.clock(), 'release', key))
+
+    def text(self):
+        """Returns what the recorded keystrokes would have produced in an editor."""
+        typed = []
+        for _, event, key in self.events:
+            if event != 'press':
+                continue
+            if key == KEY_BACKSPACE:
+                if typed:
+                    typed.pop()
+            else:
+                typed.append('\n' if key == KEY_ENTER else key)
+        return ''.join(typed)
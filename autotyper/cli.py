@@ -0,0 +1,205 @@
+# autotyper/cli.py
+"""Headless command line interface: types a file (or stdin) without the GUI.
+
+Only the typing engine is imported; Tk, the Windows-only modules and the
+update/network code are never loaded. Run it with `python -m autotyper`.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from threading import Thread
+
+from .autotyper import Autotyper
+from .backends import NullBackend
+from .planner import HAVE_NUMPY
+from .progress import ProgressChannel
+from .settings import Settings
+from .sources import TextDecodeError, load_text, open_source
+
+PROGRESS_INTERVAL = 0.5  # Seconds between progress lines
+
+
+def _parse_setting(settings, parser, assignment):
+    """Applies an `option=value` assignment (e.g. vowel_error_rate=0.02) to settings."""
+    option, sep, value = assignment.partition('=')
+    option = option.strip()
+    value = value.strip()
+    for section, options in settings.defaults.items():
+        if option in options:
+            break
+    else:
+        parser.error(f"unknown setting: {option}")
+    if not sep or not settings.validate_setting(section, option, value):
+        parser.error(f"invalid value for {option}: {value!r}")
+    settings.set_setting(section, option, value)  # Not saved to the config file
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="autotyper",
+        description="Types the given text like a human would (headless, no GUI).")
+    parser.add_argument('file', nargs='?', default='-',
+                        help="text file to type, or - for stdin (default)")
+    parser.add_argument('--wpm', type=int, default=50, help="target words per minute (default: 50)")
+    parser.add_argument('--delay', type=float, default=None,
+                        help="seconds to wait before typing (default: start_delay setting)")
+    parser.add_argument('--config', default=None,
+                        help="settings file to use (default: the application's config.ini)")
+    parser.add_argument('--set', dest='settings', action='append', default=[], metavar='OPTION=VALUE',
+                        help="override a setting for this run, e.g. --set vowel_error_rate=0.02")
+    parser.add_argument('--encoding', default=None,
+                        help="encoding of the input (default: detected from a BOM or the start of the input)")
+    parser.add_argument('--stream', action='store_true',
+                        help="type the input while reading it, in constant memory (progress is shown in bytes)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="go through the whole session without pressing any keys")
+    parser.add_argument('--simulate', action='store_true',
+                        help="run the session on a virtual clock and print a summary (instant, nothing is typed)")
+    parser.add_argument('--timeline', metavar='FILE',
+                        help="with --simulate, write every key press as a JSON line to FILE")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the typos and delays, to repeat a session exactly (default: random)")
+    parser.add_argument('--planner', choices=('numpy', 'python'), default=None,
+                        help="planner to use; a --seed only replays a session with the same one "
+                             "(default: numpy when installed)")
+    parser.add_argument('--instrument', metavar='FILE',
+                        help="time every keystroke and write latency histograms (JSON) to FILE")
+    parser.add_argument('--quiet', action='store_true', help="don't print progress")
+    return parser
+
+
+def _read_text(path, encoding):
+    if path == '-':
+        source = open_source(path, encoding)
+        return ''.join(source)
+    return load_text(path, encoding)[0]
+
+
+def _format_time(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes:02d}:{int(seconds % 60):02d}"
+
+
+def _simulate(text, wpm, settings, timeline_path, seed, use_numpy):
+    """Prints the summary of a simulated session (and optionally writes its timeline)."""
+    from .simulation import simulate
+    result = simulate(text, wpm, settings, seed, use_numpy)
+    if timeline_path:
+        with open(timeline_path, 'w', encoding='utf-8') as f:
+            for timestamp, key in result.timeline():
+                f.write(json.dumps({'t': round(timestamp, 6), 'key': key}) + '\n')
+    print(json.dumps(result.summary, indent=2))
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.wpm <= 0:
+        parser.error("--wpm must be a positive number")
+    if args.stream and args.simulate:
+        parser.error("--stream can't be combined with --simulate")
+    if args.timeline and not args.simulate:
+        parser.error("--timeline requires --simulate")
+    use_numpy = None if args.planner is None else args.planner == 'numpy'
+    if use_numpy and not HAVE_NUMPY:
+        parser.error("--planner numpy requires NumPy to be installed")
+
+    settings = Settings(os.path.abspath(args.config)) if args.config else Settings()
+    for assignment in args.settings:
+        _parse_setting(settings, parser, assignment)
+
+    if args.stream:
+        try:
+            source = open_source(args.file, args.encoding)
+        except (OSError, LookupError) as e:
+            print(f"autotyper: could not read {args.file}: {e}", file=sys.stderr)
+            return 1
+        try:
+            return _type(args, settings, source, use_numpy)
+        finally:
+            source.close()
+
+    try:
+        text = _read_text(args.file, args.encoding)
+    except (OSError, LookupError, TextDecodeError) as e:
+        print(f"autotyper: could not read {args.file}: {e}", file=sys.stderr)
+        return 1
+    text = text.strip()
+    if not text:
+        print("autotyper: nothing to type", file=sys.stderr)
+        return 1
+
+    if args.simulate:
+        return _simulate(text, args.wpm, settings, args.timeline, args.seed, use_numpy)
+    return _type(args, settings, text, use_numpy)
+
+
+def _type(args, settings, text, use_numpy):
+    """Types text (a str, or a TextSource with --stream) in a worker thread, showing progress."""
+    delay = settings.get_setting('GUI', 'start_delay') if args.delay is None else args.delay
+    autotyper = Autotyper(settings, NullBackend() if args.dry_run else None, seed=args.seed, use_numpy=use_numpy)
+    settings.watch(autotyper.update_settings)  # Edits to the settings file apply while typing
+    if args.instrument:
+        from .instrument import Instrumentation
+        autotyper.instrumentation = Instrumentation()
+    progress = ProgressChannel()
+    error = []
+
+    def run():
+        try:
+            if args.stream:
+                autotyper.start_typing_stream(text, delay, args.wpm, progress)
+            else:
+                autotyper.start_typing(text, delay, args.wpm, progress)
+        except TextDecodeError as e:
+            autotyper.cancel_typing()
+            error.append(e)
+        finally:
+            progress.close()
+
+    if not args.quiet:
+        if args.stream:
+            print(f"Typing {args.file} at {args.wpm} WPM in {delay} seconds...", file=sys.stderr)
+        else:
+            print(f"Typing {len(text)} characters at {args.wpm} WPM in {delay} seconds...", file=sys.stderr)
+    typing_thread = Thread(target=run, daemon=True)
+    typing_thread.start()
+    try:
+        while not progress.closed:
+            time.sleep(PROGRESS_INTERVAL)
+            latest = progress.poll()
+            if latest is not None and not args.quiet:
+                typed, total = latest
+                if total:
+                    remaining = _format_time(autotyper.get_remaining_time())
+                    print(f"\r{int(typed / total * 100):3d}%  {remaining} remaining", end='', file=sys.stderr)
+                else:
+                    print(f"\r{typed} bytes typed", end='', file=sys.stderr)
+    except KeyboardInterrupt:
+        autotyper.cancel_typing()
+        typing_thread.join()
+        print("\nTyping cancelled!", file=sys.stderr)
+        return 130
+
+    typing_thread.join()
+    if error:
+        print(f"\nautotyper: could not read {args.file}: {error[0]}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"\nTyping complete! (seed {autotyper.session_seed}, {autotyper.planner_kind} planner)", file=sys.stderr)
+    if args.instrument:
+        with open(args.instrument, 'w') as f:
+            json.dump(autotyper.instrumentation.export(), f, indent=2)
+        if not args.quiet:
+            for name, summary in autotyper.instrumentation.summary().items():
+                if summary['count']:
+                    print(f"{name:>9}: p50 {summary['p50_us']:.0f} us, p99 {summary['p99_us']:.0f} us, "
+                          f"max {summary['max_us']:.0f} us", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# autotyper/control.py
+import threading
+import time
+
+
+class TypingControl:
+    """Pause/resume/cancel state shared between the GUI and the typing thread.
+
+    Every wait the typing thread does goes through sleep() or
+    wait_while_paused(), which block on a Condition instead of polling,
+    so pause(), resume() and cancel() wake the typing thread right away,
+    even in the middle of a long break. Time spent paused is measured on
+    `clock` by pause() and resume() themselves (see paused_time()).
+    """
+
+    def __init__(self, clock=None):
+        self._condition = threading.Condition()
+        self.clock = clock or time.monotonic
+        self.paused = False
+        self.cancelled = False
+        self._paused_at = 0.0
+        self._paused_total = 0.0
+
+    def reset(self):
+        """Clears the paused and cancelled flags for a new session."""
+        with self._condition:
+            self.paused = False
+            self.cancelled = False
+            self._paused_total = 0.0
+            self._condition.notify_all()
+
+    def pause(self):
+        with self._condition:
+            if not self.paused:
+                self._paused_at = self.clock()
+            self.paused = True
+            self._condition.notify_all()
+
+    def resume(self):
+        with self._condition:
+            if self.paused:
+                self._paused_total += self.clock() - self._paused_at
+            self.paused = False
+            self._condition.notify_all()
+
+    def cancel(self):
+        with self._condition:
+            self.cancelled = True
+            self._condition.notify_all()
+
+    def paused_time(self):
+        """Returns the time spent paused since reset(), including a pause in progress."""
+        with self._condition:
+            if self.paused:
+                return self._paused_total + self.clock() - self._paused_at
+            return self._paused_total
+
+    def _interrupted(self):
+        return self.paused or self.cancelled
+
+    def sleep(self, seconds):
+        """Sleeps for `seconds`, returning False early if paused or cancelled."""
+        with self._condition:
+            return not self._condition.wait_for(self._interrupted, seconds)
+
+    def wait_while_paused(self):
+        """Blocks until resumed or cancelled. Returns False if cancelled."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self.paused or self.cancelled)
+            return not self.cancelled
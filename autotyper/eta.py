@@ -0,0 +1,142 @@
+# autotyper/eta.py
+import math
+
+# Character classes, each with its own expected delay
+VOWEL = 0
+CONSONANT = 1  # Anything that isn't one of the other classes (digits, symbols, ...)
+SPACE = 2
+PUNCTUATION = 3
+NEWLINE = 4
+
+
+def _uniform(low, high):
+    """Returns the (mean, variance) of a uniform distribution."""
+    return (low + high) / 2, (high - low) ** 2 / 12
+
+
+class DelayModel:
+    """Closed-form model of how long typing a text is expected to take.
+
+    One counting pass splits the text into character classes. After that
+    estimate() is O(1): every delay the planner draws is uniform, and every
+    typo is a Bernoulli trial, so the expected duration and its variance
+    are just sums over the class counts. consume() keeps the counts up to
+    date as characters are typed, so the estimate for the rest of the text
+    stays O(1) too.
+    """
+
+    def __init__(self, vowels, punctuation):
+        self.classes = {char: VOWEL for char in vowels}
+        self.classes.update({char: PUNCTUATION for char in punctuation})
+        self.classes[' '] = SPACE
+        self.classes['\n'] = NEWLINE
+        self.counts = [0] * 5
+        self.chars_since_break = 0
+
+    def count(self, text, start=0, chars_since_break=0):
+        """Counts the character classes in text[start:]."""
+        self.counts = [0] * 5
+        self.chars_since_break = chars_since_break
+        self.add(text, start)
+
+    def add(self, text, start=0):
+        """Adds the character classes in text[start:] (e.g. the next chunk of a stream)."""
+        counts = self.counts
+        counted = 0
+        for char, char_class in self.classes.items():
+            found = text.count(char, start)
+            counts[char_class] += found
+            counted += found
+        counts[CONSONANT] += max(0, len(text) - start) - counted
+
+    def consume(self, char):
+        """Removes a typed character from the counts.
+
+        chars_since_break keeps growing; estimate() takes it modulo the
+        break period, so breaks already taken aren't counted again.
+        """
+        char_class = self.classes.get(char, CONSONANT)
+        self.counts[char_class] -= 1
+        if char_class != NEWLINE:
+            self.chars_since_break += 1
+
+    def estimate(self, config, typing_speed):
+        """Returns the (mean, variance) of the time needed to type the counted text."""
+        vowels, consonants, spaces, punctuation, newlines = self.counts
+        scale = typing_speed / 0.1
+
+        char_delay = (typing_speed, (0.4 * typing_speed) ** 2 / 12)
+        word_pause = _uniform(config.word_pause_min * scale, config.word_pause_max * scale)
+        punctuation_pause = _uniform(config.punctuation_pause_min * scale, config.punctuation_pause_max * scale)
+        wrong_char = _uniform(config.wrong_char_delay_min, config.wrong_char_delay_max)
+        backspace = _uniform(config.backspace_delay_min * scale, config.backspace_delay_max * scale)
+        break_duration = _uniform(config.break_duration_min, config.break_duration_max)
+
+        # A typo costs a wrong key plus a backspace, with probability p
+        typo_mean = wrong_char[0] + backspace[0]
+        typo_second_moment = wrong_char[1] + backspace[1] + typo_mean ** 2
+
+        def typo(p):
+            mean = p * typo_mean
+            return mean, p * typo_second_moment - mean ** 2
+
+        vowel_typo = typo(config.vowel_error_rate)
+        consonant_typo = typo(config.consonant_error_rate)
+
+        # Newlines are never mistyped and don't count towards breaks
+        typed = vowels + consonants + spaces + punctuation
+        period = max(1, math.ceil(config.break_frequency))
+        breaks = (self.chars_since_break % period + typed) // period
+
+        terms = (
+            (vowels, char_delay), (vowels, vowel_typo),
+            (consonants, char_delay), (consonants, consonant_typo),
+            (spaces, word_pause), (spaces, consonant_typo),
+            (punctuation, punctuation_pause), (punctuation, consonant_typo),
+            (newlines, word_pause),
+            (breaks, break_duration),
+        )
+        mean = sum(count * term[0] for count, term in terms)
+        variance = sum(count * term[1] for count, term in terms)
+        return mean, variance
+
+    def band(self, config, typing_speed, z=1.96):
+        """Returns a (low, high) confidence band (95% by default) for the duration."""
+        mean, variance = self.estimate(config, typing_speed)
+        spread = z * math.sqrt(max(0.0, variance))
+        return max(0.0, mean - spread), mean + spread
+
+
+class LiveEta:
+    """Blends the planned remaining time with the pace typing has actually kept.
+
+    Each observe() compares how much real (unpaused) time passed with how
+    much planned delay was worked through in the same interval, and keeps
+    an exponentially weighted moving average of that ratio. The remaining
+    planned time is then scaled by it, so key injection overhead, sleep
+    overshoot and a busy machine are all reflected in the estimate.
+    """
+
+    def __init__(self, alpha=0.2, min_interval=0.5):
+        self.alpha = alpha  # Weight of the newest sample
+        self.min_interval = min_interval  # Planned seconds needed for a sample
+        self.reset()
+
+    def reset(self):
+        self.ratio = 1.0  # Real seconds per planned second
+        self._real = 0.0
+        self._planned = 0.0
+
+    def observe(self, real_elapsed, planned_elapsed):
+        """Updates the pace from the total real and planned time so far."""
+        planned = planned_elapsed - self._planned
+        if planned < self.min_interval:
+            return  # Not enough progress since the last sample (e.g. during a break)
+        sample = (real_elapsed - self._real) / planned
+        self.ratio += self.alpha * (sample - self.ratio)
+        self._real = real_elapsed
+        self._planned = planned_elapsed
+
+    def remaining(self, planned_remaining):
+        """Scales a planned remaining time by the observed pace."""
+        return planned_remaining * self.ratio
@@ -5,12 +5,16 @@ from tkinter import ttk, scrolledtext, messagebox, filedialog
 from .autotyper import Autotyper
 from .settings import Settings
 from .gui_settings import SettingsGUI
+from .progress import ProgressChannel
+from .preview import DocumentPreview
+from .sources import TextDecodeError, load_text
 from threading import Thread
-import time
 import subprocess  # For running the uninstaller
-import ctypes  # For elevation
 import sys
-import winreg  # For accessing the Windows Registry
+
+PROGRESS_POLL_MS = 33  # How often the GUI picks up typing progress (~30 Hz)
+LARGE_DOCUMENT_CHARS = 1_000_000  # Longer texts get a windowed, read-only preview
+UPDATE_POLL_MS = 250  # How often the GUI looks for the result of the background update check
 
 class AutotyperGUI:
     def __init__(self, master):
@@ -20,8 +24,10 @@ class AutotyperGUI:
 
         self.settings = Settings()
         self.autotyper = Autotyper(self.settings)
-        self.autotyper.master = master # Pass master to Autotyper.
+        self.settings.watch(self.autotyper.update_settings)  # Edits to config.ini apply right away
         self.typing_thread = None
+        self.progress_channel = None  # Progress published by the typing thread
+        self.progress_timer_id = None
         # --- Tooltips (using a simple approach) ---
         self.tooltips = {}  # Store tooltips *BEFORE* create_widgets
         self.create_widgets()
@@ -38,6 +44,7 @@ class AutotyperGUI:
 
         self.text_area = scrolledtext.ScrolledText(self.master, width=60, height=10, wrap=tk.WORD)
         self.text_area.pack(pady=5)
+        self.preview = DocumentPreview(self.text_area)  # Only used for large documents
 
         # --- File Load Button ---
         self.load_button = ttk.Button(self.master, text="Load from File", command=self.load_text_from_file)
@@ -97,21 +104,35 @@ class AutotyperGUI:
         style.configure("TEntry", padding=6)
 
 
-    def start_typing(self):
-        """Starts the autotyping process (called by the thread)."""
-        # Get the text and WPM *before* the delay
-        text = self.text_area.get("1.0", tk.END).strip()
+    def start_typing(self, text, wpm, progress):
+        """Runs the autotyping process (called by the thread).
+
+        Never touches Tk: progress goes through the channel and is applied
+        by poll_progress() on the GUI thread.
+        """
         try:
-            wpm = int(self.wpm_entry.get())
-            if wpm <= 0:
-                raise ValueError("WPM must be a positive number.")
-        except ValueError as e:
-            messagebox.showerror("Error", f"Invalid WPM: {e}")
-            self.reset_buttons()  # Reset buttons on error
+            self.autotyper.start_typing(text, 0, wpm, progress)  # delay is now 0
+        finally:
+            progress.close()
+
+    def poll_progress(self):
+        """Applies the latest typing progress and detects when typing has finished."""
+        channel = self.progress_channel
+        latest = channel.poll()
+        if latest is not None:
+            typed, total = latest
+            self.progress_var.set(int((typed / total) * 100) if total else 100)
+            self.preview.show(typed)  # Highlights what was typed (large documents only)
+        if channel.closed:
+            self.progress_timer_id = None
+            self.typing_finished()
             return
+        self.progress_timer_id = self.master.after(PROGRESS_POLL_MS, self.poll_progress)
 
-        # The actual typing happens *after* the delay, within the thread.
-        self.autotyper.start_typing(text, 0, wpm, self.progress_var)  # delay is now 0
+    def typing_finished(self):
+        """Resets the GUI after the typing thread has finished."""
+        if self.autotyper.cancelled:
+            return  # cancel_typing already reset everything
         self.status_label.config(text="Typing complete!")
         self.progress_var.set(0)  # Reset progress bar
         self.reset_buttons()
@@ -125,7 +146,7 @@ class AutotyperGUI:
         """Starts the autotyping in a separate thread."""
 
         # --- UI Setup (BEFORE the delay) ---
-        text = self.text_area.get("1.0", tk.END).strip()
+        text = self.get_text()
         if not text:
             messagebox.showwarning("Warning", "Please enter some text to type.")
             return
@@ -158,9 +179,24 @@ class AutotyperGUI:
 
     def _start_typing_thread(self):
         """Internal method to actually start the typing thread (called after the delay)."""
-        self.typing_thread = Thread(target=self.start_typing)
+        # Get the text and WPM on the GUI thread, the typing thread never touches Tk
+        text = self.get_text()
+        try:
+            wpm = int(self.wpm_entry.get())
+            if wpm <= 0:
+                raise ValueError("WPM must be a positive number.")
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid WPM: {e}")
+            self.reset_buttons()  # Reset buttons on error
+            self.progress_bar.pack_forget()
+            return
+
+        self.preview.show(0)  # Clear the highlight of an earlier run
+        self.progress_channel = ProgressChannel()
+        self.typing_thread = Thread(target=self.start_typing, args=(text, wpm, self.progress_channel))
         self.typing_thread.daemon = True
         self.typing_thread.start()
+        self.poll_progress()
         self.update_time_remaining() # NOW we start the timer
 
     def toggle_pause_resume(self):
@@ -187,14 +223,11 @@ class AutotyperGUI:
 
     def _resume_after_delay(self):
         """Resumes typing and restarts the time remaining updates (called AFTER delay)."""
-        # Get remaining text and recalculate
-        remaining_text = self.text_area.get("1.0", tk.END).strip()[len(self.autotyper.text_typed_so_far):]
+        # Recalculate from the engine's position, the text widget isn't read again
         try:
             wpm = int(self.wpm_entry.get())
             if wpm > 0:
-                self.autotyper.calculate_typing_speed(wpm)
-                self.autotyper.total_delay = self.autotyper.calculate_total_delay(remaining_text)
-                self.autotyper.start_time = time.time()  # Reset start time
+                self.autotyper.calculate_typing_speed(wpm)  # The remaining time follows the new WPM
         except ValueError: # If error in WPM
             messagebox.showerror("Error", "Invalid WPM. Please enter a positive number.")
             self.reset_buttons()
@@ -213,6 +246,9 @@ class AutotyperGUI:
         self.time_remaining_label.config(text="") # Clear
         if self.update_timer_id: # Cancel timer
             self.master.after_cancel(self.update_timer_id)
+        if self.progress_timer_id:
+            self.master.after_cancel(self.progress_timer_id)
+            self.progress_timer_id = None
         self.progress_bar.pack_forget()  # Hide on cancel
 
     def reset_buttons(self):
@@ -221,7 +257,7 @@ class AutotyperGUI:
         self.start_pause_button.config(command=self.start_typing_thread)  # Reset command
         self.cancel_button.config(state=tk.DISABLED)
         self.settings_button.config(state=tk.NORMAL)
-        self.text_area.config(state=tk.NORMAL)
+        self.text_area.config(state=tk.DISABLED if self.preview.active else tk.NORMAL)
         self.wpm_entry.config(state=tk.NORMAL)
         self.load_button.config(state=tk.NORMAL)  # Enable load button
         self.paste_button.config(state=tk.NORMAL)  # Enable paste button
@@ -230,6 +266,10 @@ class AutotyperGUI:
     def on_closing(self):
         """Handles the window close event."""
         self.autotyper.cancel_typing()
+        try:
+            self.settings.flush()  # Write settings still waiting for save_later()
+        except OSError as e:
+            print(f"Could not save settings: {e}")  # Closing must not depend on the disk
         self.master.destroy()
 
     def open_settings(self):
@@ -239,6 +279,7 @@ class AutotyperGUI:
 
 
     def update_typing_settings(self):
+      self.autotyper.update_settings()
       try:
         wpm = int(self.wpm_entry.get())
         if wpm > 0:
@@ -247,11 +288,20 @@ class AutotyperGUI:
         pass
 
     def check_for_updates(self):
-        """Checks for updates and prompts the user if available."""
+        """Starts checking for updates in the background, the window is usable right away."""
         if self.settings.get_setting('GUI', 'check_for_updates') == 'False':
             return
+        self.autotyper.updates.check_in_background()
+        self.master.after(UPDATE_POLL_MS, self.poll_update_check)
+
+    def poll_update_check(self):
+        """Prompts the user once the background update check found a new version."""
+        updates = self.autotyper.updates
+        if not updates.done:
+            self.master.after(UPDATE_POLL_MS, self.poll_update_check)
+            return
 
-        if self.autotyper.is_update_available():
+        if updates.available:
             result = messagebox.askyesnocancel("Update Available",
                                             "A new version of Autotyper is available. Do you want to update now?\n\nClick 'Yes' to update automatically.\nClick 'No' to update later.\nClick 'Cancel' to disable update checks.",
                                             )
@@ -262,7 +312,7 @@ class AutotyperGUI:
                 return
             else:
               self.settings.set_setting('GUI', 'check_for_updates', 'False')
-              self.settings.save_settings()
+              self.settings.save_later()
 
     def create_tooltips(self):
         """Creates tooltips for GUI elements."""
@@ -299,62 +349,48 @@ class AutotyperGUI:
         self.tooltip_label.place_forget()
 
     def load_text_from_file(self):
-        """Loads text from a file into the text area, handling various encodings."""
+        """Loads text from a file into the text area, detecting its encoding."""
         file_path = filedialog.askopenfilename(
             title="Select a Text File",
             filetypes=[("All Files", "*.*")]  # Remove specific text file filter
         )
         if file_path:
             try:
-                # Try UTF-8 first (most common)
-                with open(file_path, "r", encoding="utf-8") as file:
-                    text = file.read()
-                    self.text_area.delete("1.0", tk.END)  # Clear current text
-                    self.text_area.insert("1.0", text)   # Insert loaded text
-                    self.status_label.config(text=f"Loaded text from: {file_path}")
-                    return  # Success! Exit the function.
-
-            except UnicodeDecodeError:
-                # If UTF-8 fails, try other encodings
-                try:
-                    # Try the system's default encoding (often ANSI/Windows-1252 on Windows)
-                    with open(file_path, "r", encoding=None) as file:  # encoding=None uses the system default
-                        text = file.read()
-                        self.text_area.delete("1.0", tk.END)
-                        self.text_area.insert("1.0", text)
-                        self.status_label.config(text=f"Loaded text from: {file_path}")
-                        return
-
-                except UnicodeDecodeError:
-                    try:
-                        # Try UTF-16 (less common, but still possible)
-                        with open(file_path, "r", encoding="utf-16") as file:
-                            text = file.read()
-                            self.text_area.delete("1.0", tk.END)
-                            self.text_area.insert("1.0", text)
-                            self.status_label.config(text=f"Loaded text from: {file_path}")
-                            return
-
-                    except UnicodeDecodeError:
-                        # If all encodings fail, show an error
-                        messagebox.showerror("Error", "Could not decode the file.  It may not be a plain text file or may use an unsupported encoding.")
-                        self.status_label.config(text="Error loading file.")
-                    except Exception as e: # Catch any other error
-                        messagebox.showerror("Error", f"Could not load file:\n{e}")
-                        self.status_label.config(text="Error loading file.")
-                except Exception as e: # Catch any other error
-                    messagebox.showerror("Error", f"Could not load file:\n{e}")
-                    self.status_label.config(text="Error loading file.")
+                # Read once: the encoding comes from the BOM or the start of the file
+                text, encoding = load_text(file_path)
+            except TextDecodeError as e:
+                messagebox.showerror("Error", f"Could not decode the file.  It may not be a plain text file "
+                                              f"or may use an unsupported encoding.\n\n{e}")
+                self.status_label.config(text="Error loading file.")
+                return
             except Exception as e:  # Catch other exceptions (e.g., FileNotFoundError)
                 messagebox.showerror("Error", f"Could not load file:\n{e}")
                 self.status_label.config(text="Error loading file.")
+                return
+            self.set_text(text)
+            self.status_label.config(text=f"Loaded text from: {file_path} ({encoding})")
+
+    def set_text(self, text):
+        """Replaces the text to type. Very large texts are shown as a windowed preview."""
+        if len(text) > LARGE_DOCUMENT_CHARS:
+            # Read-only, only the part around the cursor is in the widget. Kept as
+            # loaded: strip() would copy the whole document while it is in memory
+            self.preview.load(text)
+        else:
+            self.preview.clear()  # Also empties the text area
+            self.text_area.insert("1.0", text)
+
+    def get_text(self):
+        """Returns the text to type (for a large document, the loaded str itself, not a copy)."""
+        if self.preview.active:
+            return self.preview.document
+        return self.text_area.get("1.0", tk.END).strip()
 
     def paste_from_clipboard(self):
         """Pastes text from the clipboard into the text area."""
         try:
             text = self.master.clipboard_get()
-            self.text_area.delete("1.0", tk.END)  # Clear current text
-            self.text_area.insert("1.0", text)   # Insert clipboard text
+            self.set_text(text)
             self.status_label.config(text="Text pasted from clipboard.")
         except tk.TclError:
             messagebox.showerror("Error", "Clipboard is empty or contains non-text data.")
@@ -370,10 +406,50 @@ class AutotyperGUI:
         self.update_timer_id = self.master.after(1000, self.update_time_remaining)  # Update every 1 second (1000ms)
 
     def update_application(self):
-        """Downloads and runs the latest installer, handling uninstallation."""
-        installer_path = self.autotyper.download_latest_installer()
+        """Downloads the latest installer in the background, then installs it."""
+        if sys.platform != 'win32':
+            messagebox.showerror("Error", "Update not supported on this platform.")
+            return
+
+        self.status_label.config(text="Downloading update...")
+        self.progress_bar.pack(fill=tk.X, padx=10, pady=5)
+        channel = ProgressChannel()
+        result = []
+
+        def download():
+            try:
+                result.append(self.autotyper.download_latest_installer(channel))
+            finally:
+                channel.close()
+
+        Thread(target=download, daemon=True).start()
+        self.poll_download(channel, result)
+
+    def poll_download(self, channel, result):
+        """Shows the download progress, and installs the update once it is downloaded."""
+        latest = channel.poll()
+        if latest is not None:
+            done, total = latest
+            self.progress_var.set(int(done / total * 100) if total else 0)
+        if not channel.closed:
+            self.master.after(PROGRESS_POLL_MS, self.poll_download, channel, result)
+            return
+
+        self.progress_var.set(0)
+        self.progress_bar.pack_forget()
+        installer_path = result[0] if result else None
         if not installer_path:
-            return  # Error handled within download_latest_installer
+            # Error printed by download_latest_installer, the next attempt resumes the download
+            self.status_label.config(text="Could not download the update.")
+            return
+        self.status_label.config(text="")
+        self.install_update(installer_path)
+
+    def install_update(self, installer_path):
+        """Runs the downloaded installer, handling uninstallation."""
+        # Windows-only modules, loaded only when actually updating
+        import ctypes  # For elevation
+        import winreg  # For accessing the Windows Registry
 
         # Find and run the uninstaller for the *current* version.
         try:
@@ -2,6 +2,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from .settings import Settings
+from .keyboard_layouts import DEFAULT_LAYOUT, available_layouts
+from .timing import MAX_SPIN_BUDGET
 
 class SettingsGUI:
     def __init__(self, master, settings, on_save_callback):
@@ -9,7 +11,7 @@ class SettingsGUI:
         self.settings = settings
         self.on_save_callback = on_save_callback
         master.title("Settings")
-        master.geometry("400x650")  # Increased height
+        master.geometry("400x700")  # Increased height
         master.resizable(False, False)
 
         self.create_widgets()
@@ -134,6 +136,33 @@ class SettingsGUI:
         self.break_duration_max_entry.insert(0, self.settings.get_setting('Typing', 'break_duration_max'))
         row += 1
 
+        ttk.Label(self.typing_frame, text="Precise Timing:",
+                  ).grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+        self.precise_timing_var = tk.BooleanVar()
+        self.precise_timing_var.set(self.settings.get_setting('Typing', 'precise_timing') == "True")
+        self.precise_timing_checkbox = ttk.Checkbutton(self.typing_frame, variable=self.precise_timing_var)
+        self.precise_timing_checkbox.grid(row=row, column=1, sticky=tk.EW, padx=5, pady=2)
+        row += 1
+
+        ttk.Label(self.typing_frame, text="Spin Budget (s):",
+                  ).grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+        self.spin_budget_entry = ttk.Entry(self.typing_frame, width=10)
+        self.spin_budget_entry.grid(row=row, column=1, sticky=tk.EW, padx=5, pady=2)
+        self.spin_budget_entry.insert(0, self.settings.get_setting('Typing', 'spin_budget'))
+        row += 1
+
+        ttk.Label(self.typing_frame, text="Keyboard Layout:",
+                  ).grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+        self.keyboard_layout_var = tk.StringVar()
+        keyboard_layout = self.settings.get_setting('Typing', 'keyboard_layout')
+        if keyboard_layout not in available_layouts():
+            keyboard_layout = DEFAULT_LAYOUT  # Its file is gone, the engine is using the default too
+        self.keyboard_layout_var.set(keyboard_layout)
+        self.keyboard_layout_combobox = ttk.Combobox(self.typing_frame, textvariable=self.keyboard_layout_var,
+                                                     values=available_layouts(), state='readonly', width=10)
+        self.keyboard_layout_combobox.grid(row=row, column=1, sticky=tk.EW, padx=5, pady=2)
+        row += 1
+
         # Allow the last row to expand, pushing everything else up
         self.typing_frame.grid_rowconfigure(row, weight=1)
         # Allow the entry column to expand
@@ -243,6 +272,20 @@ class SettingsGUI:
             messagebox.showerror("Error", "Invalid Break Duration Max")
             return
 
+        self.settings.set_setting('Typing', 'precise_timing', str(self.precise_timing_var.get()))
+
+        if self.settings.validate_setting('Typing', 'spin_budget', self.spin_budget_entry.get()):
+            self.settings.set_setting('Typing', 'spin_budget', self.spin_budget_entry.get())
+        else:
+            messagebox.showerror("Error", f"Invalid Spin Budget (0 to {MAX_SPIN_BUDGET} s)")
+            return
+
+        if self.settings.validate_setting('Typing', 'keyboard_layout', self.keyboard_layout_var.get()):
+            self.settings.set_setting('Typing', 'keyboard_layout', self.keyboard_layout_var.get())
+        else:
+            messagebox.showerror("Error", "Invalid Keyboard Layout")
+            return
+
         # GUI settings
         if self.settings.validate_setting('GUI', 'start_delay', self.start_delay_entry.get()):
             self.settings.set_setting('GUI', 'start_delay', self.start_delay_entry.get())
@@ -254,7 +297,7 @@ class SettingsGUI:
         self.settings.set_setting('GUI', 'check_for_updates', str(self.check_for_updates_var.get()))
 
 
-        self.settings.save_settings()
+        self.settings.save_later()  # Written in the background, only if something changed
         self.on_save_callback()
         self.master.destroy()
 
@@ -307,6 +350,11 @@ class SettingsGUI:
                 elif setting_name == 12:
                     child.delete(0, tk.END)
                     child.insert(0, self.settings.get_setting('Typing', 'break_duration_max'))
+                elif setting_name == 14:
+                    child.delete(0, tk.END)
+                    child.insert(0, self.settings.get_setting('Typing', 'spin_budget'))
+        self.precise_timing_var.set(self.settings.get_setting('Typing', 'precise_timing') == "True")
+        self.keyboard_layout_var.set(self.settings.get_setting('Typing', 'keyboard_layout'))
         for child in self.gui_frame.winfo_children():
             if isinstance(child, ttk.Entry):
                 child.delete(0, tk.END)
@@ -0,0 +1,127 @@
+# autotyper/instrument.py
+import math
+from array import array
+
+
+class RingBuffer:
+    """A fixed-size buffer of floats that keeps the most recent values."""
+
+    def __init__(self, size):
+        self.values = array('d', bytes(8 * size))
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, len(self.values))
+
+    def recent(self):
+        """Returns the kept values, oldest first."""
+        size = len(self.values)
+        if self.count <= size:
+            return self.values[:self.count]
+        start = self.count % size
+        return self.values[start:] + self.values[:start]
+
+
+class LatencyHistogram:
+    """An HDR-style log-linear histogram of durations, in microseconds.
+
+    Each power of two is split into 2**sub_bits linear buckets, so every
+    value is kept with a relative error below 1 / 2**sub_bits (~6% by
+    default) in constant memory, whatever the range of values.
+    """
+
+    def __init__(self, sub_bits=4):
+        self.sub_bits = sub_bits
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _bucket(self, micros):
+        value = int(micros)
+        if value < (1 << self.sub_bits):
+            return value  # Small values get a bucket each
+        shift = value.bit_length() - 1 - self.sub_bits
+        return ((value >> shift) << shift)
+
+    def record(self, seconds):
+        micros = max(0.0, seconds * 1e6)
+        bucket = self._bucket(micros)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += micros
+        if micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, p):
+        """Returns the lower bound (in microseconds) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return float(bucket)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'min_us': self.min,
+            'mean_us': self.total / self.count,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'p99.9_us': self.percentile(99.9),
+            'max_us': self.max,
+        }
+
+    def export(self):
+        """Returns the summary plus the raw [bucket_us, count] pairs."""
+        result = self.summary()
+        result['buckets'] = sorted(self.buckets.items())
+        return result
+
+
+class Instrumentation:
+    """Per-keystroke timings recorded by Autotyper.execute_plan.
+
+    For every step it records how long the key injection, the wait and the
+    progress report took, and how late the wait returned compared to its
+    deadline. Recent raw samples go into ring buffers, everything goes into
+    histograms. Set Autotyper.instrumentation to enable it; when it is None
+    the typing loop only pays for a few `is not None` checks.
+    """
+
+    SERIES = ('inject', 'wait', 'progress', 'lateness')
+
+    def __init__(self, size=65536):
+        self.size = size
+        self.reset()
+
+    def reset(self):
+        self.recent = {name: RingBuffer(self.size) for name in self.SERIES}
+        self.histograms = {name: LatencyHistogram() for name in self.SERIES}
+
+    def record(self, inject, wait, progress, lateness):
+        for name, value in zip(self.SERIES, (inject, wait, progress, lateness)):
+            self.recent[name].append(value)
+            self.histograms[name].record(value)
+
+    def summary(self):
+        """Returns a summary of every series (in microseconds)."""
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def export(self):
+        """Returns the summary including the histogram buckets, e.g. for json.dump."""
+        return {name: histogram.export() for name, histogram in self.histograms.items()}
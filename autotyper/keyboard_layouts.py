@@ -0,0 +1,159 @@
+# autotyper/keyboard_layouts.py
+import json
+import math
+import os
+import sys
+from bisect import bisect_right
+
+DEFAULT_LAYOUT = 'qwerty'
+NEIGHBOR_RADIUS = 1.3  # Key widths between key centres for keys to count as neighbors
+
+# Layout files ship next to this module (or in the executable's bundle)
+if getattr(sys, 'frozen', False):
+    LAYOUT_DIR = os.path.join(sys._MEIPASS if hasattr(sys, '_MEIPASS') else os.path.dirname(sys.executable),
+                              'layouts')
+else:
+    LAYOUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts')
+
+# The default layout is built in, so typos work even if the layout files
+# weren't bundled with the executable. Same format as the files.
+BUILTIN_LAYOUTS = {
+    'qwerty': {
+        'name': "QWERTY (US)",
+        'rows': [
+            {'offset': 0, 'keys': "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+"},
+            {'offset': 1.5, 'keys': "qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|"},
+            {'offset': 1.75, 'keys': "aA sS dD fF gG hH jJ kK lL ;: '\""},
+            {'offset': 2.25, 'keys': "zZ xX cC vV bB nN mM ,< .> /?"},
+        ],
+        'space': {'offset': 3.75, 'width': 6.25},
+    },
+}
+
+_loaded = {}  # Compiled layouts by name, they never change once built
+
+
+def available_layouts():
+    """Returns the names of the built-in layouts and those in LAYOUT_DIR (e.g. ['azerty', 'colemak', ...])."""
+    try:
+        files = {name[:-len('.json')] for name in os.listdir(LAYOUT_DIR) if name.endswith('.json')}
+    except OSError:
+        files = set()
+    return sorted(files | set(BUILTIN_LAYOUTS))
+
+
+class KeyboardLayout:
+    """A keyboard layout compiled into a table of neighboring keys.
+
+    The layout file describes the geometry: rows of keys (each key being
+    its unshifted character, optionally followed by its shifted one), the
+    offset of each row from the left edge in key widths, and the
+    spacebar's span. Compiling finds, for every character, the keys whose
+    centres are within NEIGHBOR_RADIUS of its key, on the same shift
+    level (so a typo for '!' is '@' or 'Q', not '2' or 'q'). Each neighbor
+    is weighted by 1 / distance, closer keys being hit more often.
+
+    The result is indexed by code point: nearby() is a list lookup and a
+    bisect over a handful of precomputed cumulative weights.
+    """
+
+    def __init__(self, name, rows, space=None, title=None):
+        self.name = name
+        self.title = title or name
+        self.table = []  # Code point -> (neighbor characters, cumulative weights), or None
+        self._compile(rows, space)
+
+    @classmethod
+    def load(cls, name):
+        """Reads and compiles LAYOUT_DIR/<name>.json, or a built-in layout (raises OSError or ValueError)."""
+        path = os.path.join(LAYOUT_DIR, f'{name}.json')
+        if name in BUILTIN_LAYOUTS and not os.path.exists(path):
+            data = BUILTIN_LAYOUTS[name]
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        try:
+            rows = [(float(row['offset']), row['keys'].split()) for row in data['rows']]
+            space = data.get('space')
+            if space is not None:
+                space = (float(space['offset']), float(space['width']))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"invalid layout file {path}: {e!r}") from None
+        return cls(name, rows, space, data.get('name'))
+
+    def _compile(self, rows, space):
+        # Key centres in key widths, with the characters on each shift level
+        keys = [(offset + column + 0.5, y + 0.5, chars)
+                for y, (offset, row) in enumerate(rows)
+                for column, chars in enumerate(row)]
+
+        neighbors = {}  # Character -> {neighbor: weight}
+        for x, y, chars in keys:
+            for level, char in enumerate(chars):
+                weights = neighbors.setdefault(char, {})
+                for other_x, other_y, other_chars in keys:
+                    distance = math.hypot(other_x - x, other_y - y)
+                    if 0 < distance <= NEIGHBOR_RADIUS and level < len(other_chars):
+                        other = other_chars[level]
+                        if other != char:
+                            weights[other] = weights.get(other, 0) + 1 / distance
+
+        if space is not None and rows:
+            # The spacebar sits a row below the last one; measure from the nearest point of its span
+            left, width = space
+            bottom = len(rows) + 0.5
+            weights = neighbors.setdefault(' ', {})
+            for x, y, chars in keys:
+                dx = max(left - x, 0, x - (left + width))
+                distance = math.hypot(dx, bottom - y)
+                if distance <= NEIGHBOR_RADIUS and chars[0] != ' ':
+                    weights[chars[0]] = weights.get(chars[0], 0) + 1 / distance
+
+        table = [None] * (max(map(ord, neighbors), default=-1) + 1)
+        for char, weights in neighbors.items():
+            if weights:
+                cumulative = []
+                total = 0.0
+                for weight in weights.values():
+                    total += weight
+                    cumulative.append(total)
+                table[ord(char)] = (''.join(weights), tuple(cumulative))
+        self.table = table
+
+    def neighbors(self, char):
+        """Returns the characters a typo for char can produce ('' if it has none)."""
+        code = ord(char)
+        entry = self.table[code] if code < len(self.table) else None
+        return entry[0] if entry else ''
+
+    def nearby(self, char, rng):
+        """Returns a random neighbor of char drawn with rng, or char itself if it has none."""
+        code = ord(char)
+        entry = self.table[code] if code < len(self.table) else None
+        if entry is None:
+            return char
+        chars, cumulative = entry
+        index = bisect_right(cumulative, rng.random() * cumulative[-1])
+        return chars[min(index, len(chars) - 1)]  # Rounding can land exactly on the total
+
+
+def load_layout(name):
+    """Returns the compiled layout called name, loading it on first use.
+
+    Falls back to DEFAULT_LAYOUT if it can't be loaded, and to a layout
+    without any neighbors (typos then repeat the right key) if that
+    can't be either. The fallback is cached under name too, so a missing
+    layout is only tried (and reported) once.
+    """
+    layout = _loaded.get(name)
+    if layout is None:
+        try:
+            layout = KeyboardLayout.load(name)
+        except (OSError, ValueError) as e:
+            print(f"Could not load keyboard layout {name!r}: {e}")
+            if name != DEFAULT_LAYOUT:
+                layout = load_layout(DEFAULT_LAYOUT)
+            else:
+                layout = KeyboardLayout(name, [])
+        _loaded[name] = layout
+    return layout
@@ -0,0 +1,251 @@
+# autotyper/planner.py
+import importlib.util
+import math
+import random
+from array import array
+
+# NumPy is optional, the pure Python planner is used without it. It is only
+# imported on the first vectorized plan: it would otherwise make up most of
+# the start-up time (e.g. of the command line).
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
+np = None
+
+# Plan step actions
+TYPE = 0       # Type the next source character (advances the cursor)
+TYPO = 1       # Type a wrong, neighboring character
+BACKSPACE = 2  # Erase the typo that was just typed
+BREAK = 3      # Take a break (no key is pressed)
+
+CHUNK_SIZE = 4096  # Source characters per plan chunk
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+
+class KeystrokePlan:
+    """A precomputed sequence of keystroke steps for text[start:end].
+
+    Steps are stored column-wise in compact arrays rather than as one
+    Python object each: `actions` (one byte per step), `keys` (the code
+    point to type for TYPE/TYPO steps, 0 otherwise) and `delays` (float32
+    seconds to wait after the step). A step is executed by tapping its
+    key ('\\n' meaning Enter, BACKSPACE steps pressing Backspace) and then
+    waiting its delay. `typing_speed` and `config` (a SettingsSnapshot)
+    are what it was compiled with.
+    """
+
+    def __init__(self, start, typing_speed, config=None):
+        self.start = start
+        self.end = start
+        self.typing_speed = typing_speed
+        self.config = config
+        self.actions = array('B')
+        self.keys = array('I')
+        self.delays = array('f')
+
+    def __len__(self):
+        return len(self.actions)
+
+
+class KeystrokePlanner:
+    """Turns text into KeystrokePlans, making every typing decision up front.
+
+    If NumPy is installed (and use_numpy isn't False), each range of text
+    is classified and all of its random draws are made as whole arrays
+    from a NumPy Generator, which is much faster on long texts than
+    deciding character by character.
+
+    Every draw comes from the planner's own generators (`rng`, and
+    `np_rng` with NumPy), never the global `random` module, so the same
+    seed, text and settings always give the same plan. The two paths draw
+    differently though: a seed only reproduces a plan with the same
+    use_numpy.
+    """
+
+    def __init__(self, get_nearby_char, vowels, punctuation, use_numpy=None, seed=None):
+        self.get_nearby_char = get_nearby_char
+        self.vowels = vowels
+        self.punctuation = punctuation
+        self.use_numpy = HAVE_NUMPY if use_numpy is None else use_numpy
+        if self.use_numpy and not HAVE_NUMPY:
+            raise ImportError("use_numpy requires NumPy to be installed")
+        self.rng = random.Random()
+        self.np_rng = None  # Created (from np_seed) on the first vectorized plan
+        self.np_seed = None
+        self.vowel_codes = None
+        self.punctuation_codes = None
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        """Restarts the random generators from seed (None for a fresh, unpredictable one)."""
+        self.rng.seed(seed)
+        self.np_seed = seed
+        self.np_rng = None
+
+    def plan(self, text, typing_speed, config, start=0, chars_since_break=0):
+        """Compiles all of text[start:] into a single KeystrokePlan."""
+        return self._plan_range(text, start, len(text), typing_speed, config, chars_since_break)[0]
+
+    def plan_chunks(self, text, typing_speed, config, start=0, chars_since_break=0, chunk_size=CHUNK_SIZE):
+        """Compiles text[start:] lazily, yielding one KeystrokePlan per chunk_size characters.
+
+        Typing can start as soon as the first chunk is ready, and only the
+        chunk being typed has to be kept in memory, however long the text.
+        chars_since_break carries the break counter over when re-planning
+        the rest of a session (e.g. after the WPM was changed while paused).
+        """
+        length = len(text)
+        while start < length:
+            end = min(length, start + chunk_size)
+            chunk, chars_since_break = self._plan_range(text, start, end, typing_speed, config,
+                                                        chars_since_break)
+            yield chunk
+            start = end
+
+    def _plan_range(self, text, start, end, typing_speed, config, chars_since_break):
+        """Compiles text[start:end]. Returns the plan and the updated break counter."""
+        if self.use_numpy:
+            return self._plan_range_numpy(text, start, end, typing_speed, config, chars_since_break)
+        vowel_error_rate = config.vowel_error_rate
+        consonant_error_rate = config.consonant_error_rate
+        scale = typing_speed / 0.1
+        word_pause = (config.word_pause_min * scale, config.word_pause_max * scale)
+        punctuation_pause = (config.punctuation_pause_min * scale, config.punctuation_pause_max * scale)
+        wrong_char_delay = (config.wrong_char_delay_min, config.wrong_char_delay_max)
+        backspace_delay = (config.backspace_delay_min * scale, config.backspace_delay_max * scale)
+        char_delay = (typing_speed * 0.8, typing_speed * 1.2)
+        break_frequency = config.break_frequency
+        break_duration = (config.break_duration_min, config.break_duration_max)
+
+        vowels = self.vowels
+        punctuation = self.punctuation
+        get_nearby_char = self.get_nearby_char
+        uniform = self.rng.uniform
+        roll = self.rng.random
+        plan = KeystrokePlan(start, typing_speed, config)
+        add_action = plan.actions.append
+        add_key = plan.keys.append
+        add_delay = plan.delays.append
+
+        for i in range(start, end):
+            char = text[i]
+
+            if char == '\n':
+                # Newlines are typed as Enter, never mistyped, and don't count towards breaks
+                add_action(TYPE)
+                add_key(10)
+                add_delay(uniform(*word_pause))
+                continue
+
+            error_rate = vowel_error_rate if char in vowels else consonant_error_rate
+            if roll() < error_rate:
+                add_action(TYPO)
+                add_key(ord(get_nearby_char(char)))
+                add_delay(uniform(*wrong_char_delay))
+                add_action(BACKSPACE)
+                add_key(0)
+                add_delay(uniform(*backspace_delay))
+
+            if char == ' ':
+                delay = uniform(*word_pause)
+            elif char in punctuation:
+                delay = uniform(*punctuation_pause)
+            else:
+                delay = uniform(*char_delay)
+            add_action(TYPE)
+            add_key(ord(char))
+            add_delay(delay)
+
+            chars_since_break += 1
+            if chars_since_break >= break_frequency:
+                add_action(BREAK)
+                add_key(0)
+                add_delay(uniform(*break_duration))
+                chars_since_break = 0
+
+        plan.end = end
+        return plan, chars_since_break
+
+    def _plan_range_numpy(self, text, start, end, typing_speed, config, chars_since_break):
+        """Vectorized _plan_range: same rules, with every random draw made as an array."""
+        np = _import_numpy()
+        if self.np_rng is None:
+            self.np_rng = np.random.default_rng(self.np_seed)
+            self.vowel_codes = np.array([ord(char) for char in self.vowels], dtype=np.uint32)
+            self.punctuation_codes = np.array([ord(char) for char in self.punctuation], dtype=np.uint32)
+        rng = self.np_rng
+        # surrogatepass: a str can hold lone surrogates (e.g. pasted from the clipboard)
+        codes = np.frombuffer(text[start:end].encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        count = len(codes)
+        scale = typing_speed / 0.1
+
+        # --- Classify every character ---
+        newline = codes == 10
+        space = codes == 32
+        punctuation = np.isin(codes, self.punctuation_codes)
+        vowel = np.isin(codes, self.vowel_codes)
+
+        # --- Delay after each character (uniform between a per-class min and max) ---
+        low = np.full(count, typing_speed * 0.8)
+        high = np.full(count, typing_speed * 1.2)
+        pauses = ((space | newline, config.word_pause_min, config.word_pause_max),
+                  (punctuation, config.punctuation_pause_min, config.punctuation_pause_max))
+        for mask, pause_min, pause_max in pauses:
+            low[mask] = pause_min * scale
+            high[mask] = pause_max * scale
+        char_delays = low + rng.random(count) * (high - low)
+
+        # --- Typos (newlines are never mistyped) ---
+        error_rate = np.where(vowel, config.vowel_error_rate, config.consonant_error_rate)
+        errors = (rng.random(count) < error_rate) & ~newline
+        error_count = int(errors.sum())
+        wrong_char_delays = rng.uniform(config.wrong_char_delay_min, config.wrong_char_delay_max, error_count)
+        backspace_delays = rng.uniform(config.backspace_delay_min * scale, config.backspace_delay_max * scale,
+                                       error_count)
+        get_nearby_char = self.get_nearby_char
+        wrong_chars = np.fromiter((ord(get_nearby_char(chr(code))) for code in codes[errors]),
+                                  dtype=np.uint32, count=error_count)
+
+        # --- Breaks, every `period` characters that aren't newlines ---
+        period = max(1, math.ceil(config.break_frequency))
+        chars_since_break = min(chars_since_break, period - 1)
+        counted = np.cumsum(~newline) + chars_since_break
+        breaks = ~newline & (counted % period == 0)
+        break_count = int(breaks.sum())
+        break_delays = rng.uniform(config.break_duration_min, config.break_duration_max, break_count)
+        if count:
+            chars_since_break = int(counted[-1] % period)
+
+        # --- Lay the steps out: [TYPO, BACKSPACE] TYPE [BREAK] per character ---
+        steps_per_char = 1 + 2 * errors + breaks
+        first_step = np.cumsum(steps_per_char) - steps_per_char
+        type_steps = first_step + 2 * errors
+        typo_steps = first_step[errors]
+        break_steps = type_steps[breaks] + 1
+        total = int(steps_per_char.sum())
+
+        actions = np.empty(total, dtype=np.uint8)
+        keys = np.zeros(total, dtype=np.uint32)
+        delays = np.empty(total, dtype=np.float32)
+        actions[type_steps] = TYPE
+        keys[type_steps] = codes
+        delays[type_steps] = char_delays
+        actions[typo_steps] = TYPO
+        keys[typo_steps] = wrong_chars
+        delays[typo_steps] = wrong_char_delays
+        actions[typo_steps + 1] = BACKSPACE
+        delays[typo_steps + 1] = backspace_delays
+        actions[break_steps] = BREAK
+        delays[break_steps] = break_delays
+
+        plan = KeystrokePlan(start, typing_speed, config)
+        plan.actions.frombytes(actions.tobytes())  # Plain arrays index much faster than NumPy ones
+        plan.keys.frombytes(keys.astype(plan.keys.typecode).tobytes())
+        plan.delays.frombytes(delays.tobytes())
+        plan.end = end
+        return plan, chars_since_break
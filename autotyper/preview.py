@@ -0,0 +1,114 @@
+# autotyper/preview.py
+import tkinter as tk
+
+WINDOW_CHARS = 20000  # Characters of a large document shown at a time
+SNAP_CHARS = 1000  # How far to look for a line break to cut the window at
+
+
+class DocumentPreview:
+    """Shows a window of a large document in a Text widget instead of all of it.
+
+    Tk gets sluggish with megabytes of text in a widget, so only about
+    window_chars characters around a position are inserted, cut at line
+    breaks. The document stays a plain str (the same one the engine types),
+    and loading it, scrolling, and highlighting the typing progress only
+    cost as much as the window, whatever the size of the document.
+    Scrolling to either end of the window moves it along the document.
+    The widget is read-only while a document is shown.
+    """
+
+    def __init__(self, text_widget, window_chars=WINDOW_CHARS):
+        self.widget = text_widget
+        self.window_chars = window_chars
+        self.document = None  # None when the widget holds ordinary, editable text
+        self.start = 0  # Document offset of the first character shown
+        self.end = 0  # Document offset just past the last character shown
+        self.cursor = 0  # Characters typed so far (highlighted)
+        self._shift_pending = False
+        text_widget.tag_configure('typed', foreground='gray50')
+        # Watch the scroll position to move the window at its edges
+        self._set_scrollbar = text_widget.vbar.set if hasattr(text_widget, 'vbar') else None
+        text_widget.configure(yscrollcommand=self._on_scroll)
+
+    @property
+    def active(self):
+        return self.document is not None
+
+    def load(self, document):
+        """Shows the start of document (the widget becomes read-only)."""
+        self.document = document
+        self.cursor = 0
+        self._render(0)
+        self.widget.yview_moveto(0)
+
+    def clear(self):
+        """Leaves large-document mode, emptying the widget and making it editable again."""
+        self.document = None
+        self.start = self.end = self.cursor = 0
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete("1.0", tk.END)
+
+    def show(self, cursor):
+        """Highlights the first `cursor` characters as typed and keeps the cursor in view."""
+        if self.document is None:
+            return
+        previous = self.cursor
+        self.cursor = cursor
+        margin = self.window_chars // 4
+        if cursor < self.start or (cursor > self.end - margin and self.end < len(self.document)):
+            self._render(cursor - self.window_chars // 2)  # Re-centre on the cursor
+        elif cursor > previous:
+            self.widget.tag_add('typed', self._index(max(previous, self.start)), self._index(cursor))
+        elif cursor < previous:
+            self.widget.tag_remove('typed', self._index(cursor), tk.END)
+        self.widget.see(self._index(cursor))
+
+    def _index(self, offset):
+        """Converts a document offset inside the window into a Text index."""
+        return f"1.0 + {offset - self.start} chars"
+
+    def _render(self, start):
+        """Fills the widget with the window starting around document offset start."""
+        document = self.document
+        start = min(max(0, start), max(0, len(document) - self.window_chars))
+        if start:
+            # Start at a line break, looking back a bounded distance only
+            line_start = document.rfind('\n', max(0, start - SNAP_CHARS), start)
+            if line_start != -1:
+                start = line_start + 1
+        end = min(len(document), start + self.window_chars)
+        if end < len(document):
+            line_end = document.find('\n', end, end + SNAP_CHARS)
+            if line_end != -1:
+                end = line_end + 1
+        self.start = start
+        self.end = end
+
+        widget = self.widget
+        widget.config(state=tk.NORMAL)
+        widget.delete("1.0", tk.END)
+        widget.insert("1.0", document[start:end])
+        if self.cursor > start:
+            widget.tag_add('typed', "1.0", self._index(min(self.cursor, end)))
+        widget.config(state=tk.DISABLED)
+
+    def _on_scroll(self, first, last):
+        """yscrollcommand: updates the scrollbar and moves the window at its edges."""
+        if self._set_scrollbar is not None:
+            self._set_scrollbar(first, last)
+        if self.document is None or self._shift_pending:
+            return
+        if float(last) >= 1.0 and self.end < len(self.document):
+            self._shift_pending = True
+            self.widget.after_idle(self._shift, self.end)
+        elif float(first) <= 0.0 and self.start > 0:
+            self._shift_pending = True
+            self.widget.after_idle(self._shift, self.start)
+
+    def _shift(self, anchor):
+        """Moves the window so the edge the user scrolled to (anchor) sits in its middle."""
+        self._shift_pending = False
+        if self.document is None:
+            return
+        self._render(anchor - self.window_chars // 2)
+        self.widget.see(self._index(min(max(anchor, self.start), self.end)))
@@ -0,0 +1,32 @@
+# autotyper/progress.py
+
+
+class ProgressChannel:
+    """Carries progress from the typing thread to whoever displays it.
+
+    Updates are coalesced: publish() just replaces the latest value, so the
+    typing thread never blocks or touches the GUI, and the reader picks up
+    whatever is newest at its own pace (see AutotyperGUI.poll_progress).
+    Replacing a single attribute is atomic in CPython, so no lock is needed.
+    """
+
+    def __init__(self):
+        self._latest = (0, 0, 0)  # (sequence, typed, total)
+        self._seen = 0
+        self.closed = False
+
+    def publish(self, typed, total):
+        """Records that `typed` out of `total` characters have been typed."""
+        self._latest = (self._latest[0] + 1, typed, total)
+
+    def poll(self):
+        """Returns (typed, total) if it changed since the last poll, else None."""
+        sequence, typed, total = self._latest
+        if sequence == self._seen:
+            return None
+        self._seen = sequence
+        return typed, total
+
+    def close(self):
+        """Marks the session as finished (whether it completed or was cancelled)."""
+        self.closed = True
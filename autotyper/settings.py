@@ -1,7 +1,49 @@
 # autotyper/settings.py
 import configparser
+import io
 import os
+import stat
 import sys
+import tempfile
+import threading
+
+from .keyboard_layouts import DEFAULT_LAYOUT, available_layouts
+from .timing import MAX_SPIN_BUDGET
+
+SAVE_DELAY = 0.5  # Seconds save_later() waits for more changes before writing
+WATCH_INTERVAL = 2.0  # Seconds between checks of the config file in watch()
+
+
+class SettingsSnapshot:
+    """An immutable, typed copy of the settings, read with plain attribute access.
+
+    Built by Settings.snapshot() so the typing engine never has to go
+    through configparser while typing.
+    """
+
+    __slots__ = ('vowel_error_rate', 'consonant_error_rate',
+                 'word_pause_min', 'word_pause_max',
+                 'punctuation_pause_min', 'punctuation_pause_max',
+                 'wrong_char_delay_min', 'wrong_char_delay_max',
+                 'backspace_delay_min', 'backspace_delay_max',
+                 'break_frequency', 'break_duration_min', 'break_duration_max',
+                 'precise_timing', 'spin_budget', 'keyboard_layout',
+                 'start_delay', 'check_for_updates')
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SettingsSnapshot is immutable")
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"SettingsSnapshot({values})"
+
 
 class Settings:
     def __init__(self, config_file='config.ini'):
@@ -15,7 +57,13 @@ class Settings:
 
         self.config_file = os.path.join(base_dir, config_file)
         self.config = configparser.ConfigParser()
-
+        self._snapshot = None  # Cached SettingsSnapshot, rebuilt after a change
+        self._dirty = set()  # (section, option) changed since the last save
+        self._lock = threading.Lock()  # Guards config and _dirty against a background save
+        self._save_lock = threading.Lock()  # One write to the file at a time
+        self._save_timer = None  # Pending save_later()
+        self._file_state = None  # (mtime, inode, size) of the config file when last read or written
+        self._watch_stop = None  # Set to stop watch()
 
         # Define default settings
         self.defaults = {
@@ -33,6 +81,9 @@ class Settings:
                 'break_frequency': 500,  # Characters per break
                 'break_duration_min': 2.0,
                 'break_duration_max': 5.0,
+                'precise_timing': "False",  # Finish each wait with a short busy-wait
+                'spin_budget': 0.002,  # Seconds to busy-wait at the end of each wait
+                'keyboard_layout': DEFAULT_LAYOUT,  # Typos hit its neighboring keys (a file in layouts/)
             },
             'GUI': {
                 'start_delay': 5,
@@ -40,27 +91,174 @@ class Settings:
             }
         }
 
-        # Load settings from file, or create file with defaults
+        # Load settings from file (missing ones get their defaults)
         self.load_settings()
 
     def load_settings(self):
-        """Loads settings from the config file."""
+        """Loads settings from the config file.
+
+        Options missing from the file get their defaults in memory only:
+        loading never writes, the file is only written once a setting changes.
+        """
+        self._file_state = self._stat()
         if os.path.exists(self.config_file):
             self.config.read(self.config_file)
-        # Ensure all sections and options are present, add missing ones from defaults
+        self._add_defaults(self.config)
+        self._snapshot = None
+
+    def _add_defaults(self, config):
+        """Ensure all sections and options are present, add missing ones from defaults."""
         for section, options in self.defaults.items():
-            if not self.config.has_section(section):
-                self.config.add_section(section)
+            if not config.has_section(section):
+                config.add_section(section)
             for option, value in options.items():
                 # Crucially, *always* get the default here, ensuring correct type
-                if not self.config.has_option(section, option):
-                    self.config.set(section, option, str(value))
-        self.save_settings()
+                if not config.has_option(section, option):
+                    config.set(section, option, str(value))
+
+    def _stat(self):
+        """Returns what tells whether the config file changed: (mtime, inode, size), or None."""
+        try:
+            info = os.stat(self.config_file)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_ino, info.st_size
+
+    def reload_if_changed(self):
+        """Re-reads the config file if it changed on disk since it was last read or written.
+
+        Costs a single stat() when it didn't change. Settings changed here
+        but not saved yet keep their values. Returns True if the settings
+        were reloaded (snapshot() then returns a new SettingsSnapshot).
+        """
+        state = self._stat()
+        if state == self._file_state or state is None or state[2] == 0:
+            return False  # Unchanged, deleted, or caught half-way through being rewritten
+        if not self._save_lock.acquire(blocking=False):
+            return False  # We're writing it ourselves, check again next time
+        try:
+            return self._reload(state)
+        finally:
+            self._save_lock.release()
+
+    def _reload(self, state):
+        config = configparser.ConfigParser()
+        try:
+            config.read(self.config_file)
+        except configparser.Error as e:
+            print(f"Ignoring invalid settings file: {e}")
+            self._file_state = state  # Wait for the next change
+            return False
+        with self._lock:
+            for section, option in self._dirty:
+                if not config.has_section(section):
+                    config.add_section(section)
+                config.set(section, option, self.config.get(section, option))
+            self._add_defaults(config)
+            self.config = config
+            self._file_state = state
+        self._snapshot = None
+        return True
+
+    def watch(self, callback, interval=WATCH_INTERVAL):
+        """Reloads the config file whenever it changes on disk, for as long as the app runs.
+
+        A background thread checks the file every `interval` seconds (see
+        reload_if_changed) and calls callback() after each reload, e.g.
+        Autotyper.update_settings to apply the new values while typing.
+        """
+        self.stop_watching()
+        stop = threading.Event()
+        self._watch_stop = stop
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    if self.reload_if_changed():
+                        callback()
+                except OSError as e:
+                    print(f"Could not reload settings: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stop_watching(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    @property
+    def dirty(self):
+        """True if a setting changed since the last save."""
+        return bool(self._dirty)
 
     def save_settings(self):
-        """Saves settings to the config file."""
-        with open(self.config_file, 'w') as configfile:
-            self.config.write(configfile)
+        """Saves settings to the config file, if any changed since the last save.
+
+        The file is written to a temporary file next to it, which then
+        replaces it in one step, so no reader (or crash) ever sees it half
+        written. Returns True if the file was written.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                saved = set(self._dirty)
+                contents = io.StringIO()
+                self.config.write(contents)
+                self._dirty.clear()
+            try:
+                self._write_atomically(contents.getvalue())
+            except BaseException:
+                with self._lock:
+                    self._dirty |= saved  # Try again on the next save
+                raise
+            return True
+
+    def _write_atomically(self, contents):
+        directory = os.path.dirname(self.config_file) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as temp_file:
+                temp_file.write(contents)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            if os.path.exists(self.config_file):
+                os.chmod(temp_path, stat.S_IMODE(os.stat(self.config_file).st_mode))  # Keep its permissions
+            os.replace(temp_path, self.config_file)
+            self._file_state = self._stat()  # Our own write isn't a change to reload
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def save_later(self, delay=SAVE_DELAY):
+        """Saves the settings on a background thread after `delay` seconds.
+
+        The caller (e.g. the GUI thread) never waits for the disk, and
+        changes made within the delay are written together.
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(delay, self._save_in_background)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_in_background(self):
+        try:
+            self.save_settings()
+        except OSError as e:
+            print(f"Could not save settings: {e}")
+
+    def flush(self):
+        """Saves any pending changes right away (e.g. before exiting)."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+        return self.save_settings()
 
     def get_setting(self, section, option):
         """Retrieves a setting value, converting to the appropriate type.
@@ -69,11 +267,11 @@ class Settings:
         try:
             if option.endswith('_rate'):
                 return self.config.getfloat(section, option)
-            elif option.endswith('_delay') or option.endswith('_min') or option.endswith('_max') or option == 'break_frequency':
+            elif option.endswith('_delay') or option.endswith('_min') or option.endswith('_max') or option in ('break_frequency', 'spin_budget'):
                 return self.config.getfloat(section, option)
             elif option == 'start_delay':
                 return self.config.getint(section, option)
-            elif option == 'check_for_updates':
+            elif option in ('check_for_updates', 'precise_timing'):
                 return self.config.get(section, option)
             else:
                 return self.config.get(section, option)  # Fallback
@@ -85,14 +283,35 @@ class Settings:
         """Sets a setting value."""
         if not self.config.has_section(section):
             self.config.add_section(section)
-        self.config.set(section, option, str(value))
+        value = str(value)
+        if self.config.get(section, option, fallback=None) != value:
+            with self._lock:
+                self.config.set(section, option, value)
+                self._dirty.add((section, option))
+            self._snapshot = None  # Only rebuild the snapshot if something changed
+
+    def snapshot(self):
+        """Returns a SettingsSnapshot of the current settings.
+
+        The snapshot is cached and only rebuilt after a setting changes.
+        """
+        if self._snapshot is None:
+            get = self.get_setting
+            values = {option: get('Typing', option) for option in self.defaults['Typing']}
+            values['precise_timing'] = values['precise_timing'] == "True"
+            self._snapshot = SettingsSnapshot(
+                **values,
+                start_delay=get('GUI', 'start_delay'),
+                check_for_updates=get('GUI', 'check_for_updates') == "True",
+            )
+        return self._snapshot
 
     def reset_to_defaults(self):
         """Resets all settings to their default values."""
         for section, options in self.defaults.items():
             for option, value in options.items():
                 self.set_setting(section, option, value)  # Use set_setting for consistency
-        self.save_settings()
+        self.save_later()
 
     def validate_setting(self, section, option, value):
         """Validates a setting value based on its expected type.
@@ -102,14 +321,18 @@ class Settings:
             if option.endswith('_rate'):
                 float(value)  # Check if it can be converted to float
                 return 0.0 <= float(value) <= 1.0  # Rates should be between 0 and 1
+            elif option == 'spin_budget':
+                return 0.0 <= float(value) <= MAX_SPIN_BUDGET  # Busy-waiting longer just burns CPU
             elif option.endswith('_delay') or option.endswith('_min') or option.endswith('_max') or option == 'break_frequency':
                 float(value)
                 return float(value) >= 0.0  # Delays should be non-negative
             elif option == 'start_delay':
                 int(value)
                 return int(value) >= 0
-            elif option == 'check_for_updates':
+            elif option in ('check_for_updates', 'precise_timing'):
                 return value in ("True", "False")
+            elif option == 'keyboard_layout':
+                return value == DEFAULT_LAYOUT or value in available_layouts()
             else:
                 return True # No validation for other types (shouldn't be any)
         except ValueError:
@@ -0,0 +1,51 @@
+# autotyper/simulation.py
+from .autotyper import Autotyper
+from .backends import RecordingBackend, KEY_BACKSPACE
+from .timing import VirtualClock
+
+
+class SimulationResult:
+    """The keystroke timeline and summary of a simulated session."""
+
+    def __init__(self, events, summary):
+        self.events = events  # [(seconds since start, 'press'/'release', key), ...]
+        self.summary = summary
+
+    def timeline(self):
+        """Returns the key presses only, as (seconds since start, key)."""
+        return [(timestamp, key) for timestamp, event, key in self.events if event == 'press']
+
+
+def simulate(text, wpm, settings=None, seed=None, use_numpy=None):
+    """Runs a whole typing session on a virtual clock and returns a SimulationResult.
+
+    Every delay, pause and break goes through the same engine as a real
+    session, but the clock just jumps ahead, so a 50-page document takes
+    moments instead of hours. Nothing is typed. The same seed, text,
+    settings and planner always give the same timeline; summary['seed']
+    and summary['planner'] hold the ones that were used (the NumPy and
+    pure Python planners draw differently, see use_numpy).
+    """
+    clock = VirtualClock()
+    backend = RecordingBackend(clock)
+    autotyper = Autotyper(settings, backend, clock, seed, use_numpy)
+    autotyper.start_typing(text, 0, wpm)
+
+    duration = clock.now
+    presses = [(timestamp, key) for timestamp, event, key in backend.events if event == 'press']
+    typos = sum(1 for _, key in presses if key == KEY_BACKSPACE)
+    chars_per_minute = len(text) / (duration / 60) if duration else 0.0
+    summary = {
+        'chars': len(text),
+        'keystrokes': len(presses),
+        'typos': typos,
+        'breaks': autotyper.breaks_taken,
+        'duration': duration,
+        'target_wpm': wpm,
+        'achieved_wpm': chars_per_minute / 6,  # Same 6 characters per word as calculate_typing_speed
+        'estimated_duration': autotyper.total_delay,
+        'lateness': autotyper.scheduler.lateness,
+        'seed': autotyper.session_seed,
+        'planner': autotyper.planner_kind,
+    }
+    return SimulationResult(backend.events, summary)
@@ -0,0 +1,227 @@
+# autotyper/sources.py
+import codecs
+import io
+import locale
+import mmap
+import os
+import sys
+
+READ_SIZE = 64 * 1024  # Bytes read (and decoded) at a time
+SAMPLE_SIZE = 64 * 1024  # Bytes looked at to guess the encoding
+DECODE_BLOCK = 1024 * 1024  # Bytes load_text decodes at a time when line endings need translating
+
+# Checked in order: the UTF-32 LE BOM starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class TextDecodeError(ValueError):
+    """A file couldn't be decoded; offset is the byte offset of the bad data."""
+
+    def __init__(self, path, encoding, offset, reason):
+        super().__init__(f"can't decode byte offset {offset} as {encoding} ({reason})")
+        self.path = path
+        self.encoding = encoding
+        self.offset = offset
+
+
+def fallback_encoding():
+    """The encoding for text that isn't UTF: the system's, or Latin-1 (which decodes anything)."""
+    encoding = locale.getpreferredencoding(False)
+    return 'latin-1' if codecs.lookup(encoding).name == 'utf-8' else encoding
+
+
+def detect_encoding(sample):
+    """Guesses the encoding of a file from its first bytes.
+
+    A BOM decides it outright. Otherwise text made of NUL bytes every
+    other byte is taken as BOM-less UTF-16, text that decodes as UTF-8 is
+    UTF-8 (a character cut off at the end of the sample is fine), and
+    anything else uses fallback_encoding().
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if len(sample) >= 2:
+        half = len(sample) // 2
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        if odd_nuls > half * 0.4 and even_nuls < half * 0.05:
+            return 'utf-16-le'
+        if even_nuls > half * 0.4 and odd_nuls < half * 0.05:
+            return 'utf-16-be'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return fallback_encoding()
+
+
+class TextSource:
+    """Text read incrementally from a binary file, for Autotyper.start_typing_stream.
+
+    Iterating yields the text in decoded chunks (an incremental decoder
+    handles characters split across reads), so only one chunk is ever in
+    memory and typing can start as soon as the first one arrives. Line
+    endings are translated to '\\n' as in a file opened in text mode, even
+    a '\\r\\n' split across two reads.
+    bytes_read and total_bytes (None when unknown, e.g. for a pipe) let
+    progress be measured in bytes of the source.
+    """
+
+    def __init__(self, file, encoding='utf-8', errors='strict', total_bytes=None, read_size=READ_SIZE):
+        self.file = file
+        self.encoding = encoding
+        # A UTF-8 BOM is skipped here rather than by the decoder, so decode errors count it in their offsets
+        self.skip_bom = codecs.lookup(encoding).name == 'utf-8-sig'
+        self.decoder = codecs.getincrementaldecoder('utf-8' if self.skip_bom else encoding)(errors)
+        self.newlines = io.IncrementalNewlineDecoder(self.decoder, translate=True)
+        self.total_bytes = total_bytes
+        self.read_size = read_size
+        self.bytes_read = 0
+        # Character and byte offsets of the last chunk handed out
+        self.chunk_chars = (0, 0)
+        self.chunk_bytes = (0, 0)
+
+    def __iter__(self):
+        chars = 0
+        head = b''
+        if self.skip_bom:
+            head = self.file.read(len(codecs.BOM_UTF8))
+            if head == codecs.BOM_UTF8:
+                self.bytes_read = len(head)
+                head = b''
+        while True:
+            data = head + self.file.read(self.read_size)
+            head = b''
+            start = self.bytes_read
+            self.bytes_read += len(data)
+            pending = len(self.decoder.getstate()[0])  # Bytes held back from the last read
+            try:
+                text = self.newlines.decode(data, final=not data)
+            except UnicodeDecodeError as e:
+                # e.start counts from the held back bytes, not from this read
+                raise TextDecodeError(getattr(self.file, 'name', '<stdin>'), self.encoding,
+                                      start - pending + e.start, e.reason) from None
+            if text:
+                self.chunk_chars = (chars, chars + len(text))
+                self.chunk_bytes = (start, self.bytes_read)
+                chars += len(text)
+                yield text
+            if not data:
+                return
+
+    def byte_offset(self, position):
+        """Converts a character position in the last chunk into a byte offset (interpolated)."""
+        first_char, end_char = self.chunk_chars
+        first_byte, end_byte = self.chunk_bytes
+        if end_char == first_char:
+            return end_byte
+        return first_byte + (position - first_char) * (end_byte - first_byte) // (end_char - first_char)
+
+    def close(self):
+        if self.file is not sys.stdin.buffer:
+            self.file.close()
+
+
+class ByteProgress:
+    """Publishes typing progress of a TextSource in bytes rather than characters.
+
+    Wraps a ProgressChannel: the engine publishes characters typed as
+    usual, and the channel receives (bytes typed, total bytes), with a
+    total of 0 when the size of the source isn't known.
+    """
+
+    def __init__(self, channel, source):
+        self.channel = channel
+        self.source = source
+
+    def publish(self, typed, total):
+        self.channel.publish(self.source.byte_offset(typed), self.source.total_bytes or 0)
+
+
+def open_source(path, encoding='utf-8', errors='strict'):
+    """Opens a file (or stdin for '-') as a TextSource.
+
+    With encoding=None it is detected from the start of the input (see
+    detect_encoding); the start is peeked at, not consumed.
+    """
+    if path == '-':
+        file = sys.stdin.buffer
+        total_bytes = None
+    else:
+        file = open(path, 'rb')
+        total_bytes = os.fstat(file.fileno()).st_size
+    if encoding is None:
+        if path == '-':
+            sample = file.peek(SAMPLE_SIZE)[:SAMPLE_SIZE]
+        else:
+            sample = file.read(SAMPLE_SIZE)
+            file.seek(0)
+        encoding = detect_encoding(sample)
+    return TextSource(file, encoding, errors, total_bytes)
+
+
+def _decode(path, mapped, encoding):
+    """Decodes a whole mapped file, translating line endings to '\\n' as text mode does."""
+    skip = 0
+    codec = encoding
+    if codecs.lookup(encoding).name == 'utf-8-sig':
+        codec = 'utf-8'  # Skip the BOM here, so error offsets count it
+        if mapped[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+            skip = len(codecs.BOM_UTF8)
+    position = pending = 0
+    with memoryview(mapped) as whole, whole[skip:] as view:
+        try:
+            if mapped.find(b'\r', skip) == -1:
+                return str(view, codec)  # Nothing to translate: one call, no copy of the text
+            # Translate while decoding, a block at a time, rather than in passes over the whole text
+            decoder = codecs.getincrementaldecoder(codec)()
+            newlines = io.IncrementalNewlineDecoder(decoder, translate=True)
+            parts = []
+            for position in range(0, len(view), DECODE_BLOCK):
+                pending = len(decoder.getstate()[0])  # Bytes held back from the last block
+                with view[position:position + DECODE_BLOCK] as block:
+                    parts.append(newlines.decode(block, final=position + DECODE_BLOCK >= len(view)))
+            return ''.join(parts)
+        except UnicodeDecodeError as e:
+            raise TextDecodeError(path, encoding, skip + position - pending + e.start, e.reason) from None
+
+
+def load_text(path, encoding=None):
+    """Reads a whole text file, detecting its encoding if none is given.
+
+    The file is memory-mapped and decoded straight from the mapping, so it
+    is read once and never copied into a bytes object. Line endings are
+    translated to '\\n' as in a file opened in text mode. Peak memory is
+    about the decoded text itself, or twice that when there are '\\r'
+    characters to translate (the text is then decoded in blocks and
+    joined). If the file was only guessed to be UTF-8 (its start decoded
+    as UTF-8, but there's no BOM) and it turns out not to be, it is
+    decoded again from the same mapping with fallback_encoding(). Returns
+    (text, encoding); raises TextDecodeError (with the byte offset of the
+    bad data) if it doesn't decode.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return "", encoding or 'utf-8'  # Empty files can't be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            guessed = encoding is None
+            if guessed:
+                encoding = detect_encoding(mapped[:SAMPLE_SIZE])
+            try:
+                return _decode(path, mapped, encoding), encoding
+            except TextDecodeError as error:
+                if not (guessed and encoding == 'utf-8'):
+                    raise
+                # Plain ASCII at the start, something else (e.g. Windows-1252) further on
+                encoding = fallback_encoding()
+                try:
+                    return _decode(path, mapped, encoding), encoding
+                except TextDecodeError:
+                    raise error from None
@@ -0,0 +1,144 @@
+# autotyper/timing.py
+import time
+from array import array
+
+MAX_SPIN_BUDGET = 0.05  # Seconds; longer busy-waits would burn CPU and ignore pause/cancel
+
+
+def plain_sleep(seconds):
+    """Sleeps uninterruptibly (the default sleep for DeadlineScheduler)."""
+    time.sleep(seconds)
+    return True
+
+
+class VirtualClock:
+    """A clock that only moves when it is slept on.
+
+    Pass it to Autotyper (or DeadlineScheduler) to run a whole typing
+    session, breaks included, in a fraction of a second. Calling the
+    clock returns the current virtual time.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        return True
+
+
+class DeadlineScheduler:
+    """Waits until absolute deadlines on a monotonic clock.
+
+    Every wait is measured from the previous deadline rather than from
+    "now", so the time spent pressing keys and updating the GUI doesn't
+    add up over a long session. Any time the scheduler arrives *after*
+    a deadline is accumulated in `lateness`.
+
+    With a `spin_budget` (seconds), each wait sleeps until shortly before
+    its deadline and busy-waits the rest of the way, trading a little CPU
+    for sub-millisecond accuracy at high WPM. The busy-wait is capped at
+    MAX_SPIN_BUDGET, after an interruptible sleep. How far each wait woke up
+    from its deadline is kept for jitter_report().
+
+    `sleep(seconds)` must return False if the wait was interrupted (e.g.
+    TypingControl.sleep when paused or cancelled), in which case wait()
+    returns False too and the deadline stays pending for wait_pending().
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=plain_sleep, max_catchup=1.0,
+                 spin_budget=0.0, jitter_samples=10000):
+        self.clock = clock
+        self.sleep = sleep
+        self.max_catchup = max_catchup  # Don't try to catch up more than this (seconds)
+        self.spin_budget = spin_budget  # 0 = plain sleep
+        self.jitter = array('d', bytes(8 * jitter_samples))  # Ring buffer of wake-up errors
+        self.jitter_count = 0
+        self.last_error = 0.0  # How late the last wait returned
+        self.deadline = 0.0
+        self.lateness = 0.0   # Total time (seconds) the scheduler ran behind its deadlines
+        self.late_waits = 0   # Number of waits that started after their deadline
+        self.waits = 0
+
+    def start(self):
+        """Starts a new schedule at the current time."""
+        self.deadline = self.clock()
+        self.lateness = 0.0
+        self.late_waits = 0
+        self.waits = 0
+        self.jitter_count = 0
+
+    def shift(self, seconds):
+        """Pushes the schedule back by `seconds` (e.g. the length of a pause)."""
+        self.deadline += seconds
+
+    def wait(self, delay):
+        """Waits until `delay` seconds after the previous deadline.
+
+        Returns False if the sleep was interrupted before the deadline.
+        """
+        self.deadline += delay
+        self.waits += 1
+        return self.wait_pending()
+
+    def wait_pending(self):
+        """Waits until the current deadline. Returns False if interrupted."""
+        deadline = self.deadline
+        clock = self.clock
+        remaining = deadline - clock()
+        if remaining > 0:
+            spin_budget = min(self.spin_budget, MAX_SPIN_BUDGET)
+            if remaining > spin_budget:
+                if not self.sleep(remaining - spin_budget):
+                    return False
+            if spin_budget:
+                while clock() < deadline:
+                    pass
+            error = clock() - deadline
+        else:
+            error = -remaining
+            self.lateness += error
+            self.late_waits += 1
+            if error > self.max_catchup:
+                # Too far behind (e.g. the system was suspended), don't rush the next keys
+                self.deadline = clock()
+        self.last_error = error
+        jitter = self.jitter
+        jitter[self.jitter_count % len(jitter)] = error
+        self.jitter_count += 1
+        return True
+
+    def jitter_report(self):
+        """Returns wake-up error statistics (in milliseconds) for recent waits.
+
+        The error is how late each wait returned compared to its deadline
+        (including waits that started after their deadline had passed).
+        """
+        count = min(self.jitter_count, len(self.jitter))
+        if not count:
+            return {'samples': 0}
+        errors = sorted(self.jitter[:count])
+
+        def percentile(p):
+            return errors[min(count - 1, int(p / 100 * count))] * 1000
+
+        return {
+            'samples': count,
+            'mean_ms': sum(errors) / count * 1000,
+            'p50_ms': percentile(50),
+            'p90_ms': percentile(90),
+            'p99_ms': percentile(99),
+            'max_ms': errors[-1] * 1000,
+        }
+
+    def report(self):
+        """Returns a summary of how well the schedule was kept."""
+        return {
+            'waits': self.waits,
+            'late_waits': self.late_waits,
+            'lateness': self.lateness,
+            'jitter': self.jitter_report(),
+        }
@@ -0,0 +1,270 @@
+# autotyper/updates.py
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from .constants import VERSION
+
+CHECK_TIMEOUT = 5  # Seconds to wait for the releases API
+CACHE_TTL = 6 * 60 * 60  # Seconds a cached release is used without asking the server
+DOWNLOAD_TIMEOUT = (5, 30)  # Seconds to connect, and to wait for more data
+DOWNLOAD_ATTEMPTS = 5  # Tries (each resuming where the last stopped) before giving up
+
+# Download chunk sizes adapt to the connection: doubled while reads are
+# quick, halved when a read takes long, so progress stays smooth
+FIRST_CHUNK = 64 * 1024
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+FAST_READ = 0.05  # Seconds
+SLOW_READ = 0.5
+
+
+class DownloadError(Exception):
+    """A download failed for good (e.g. its SHA-256 didn't match)."""
+
+
+class _Interrupted(Exception):
+    """The server stopped sending before the end of the file (retried)."""
+
+
+def default_cache_file():
+    """Where the release metadata is cached (a per-user directory, the install one may be read-only)."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'Autotyper', 'latest_release.json')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'autotyper', 'latest_release.json')
+
+
+def download(session, url, path, sha256=None, size=None, progress=None,
+             timeout=DOWNLOAD_TIMEOUT, attempts=DOWNLOAD_ATTEMPTS):
+    """Downloads url to path, resuming from where an earlier attempt stopped.
+
+    Data goes to path + '.part' and is hashed while it streams; the file
+    only gets its real name once it is complete and (if sha256 is given)
+    verified. If the connection drops, the download resumes with an HTTP
+    Range request, here or on the next call, even after a restart.
+    progress (a ProgressChannel) gets (bytes done, total bytes). Returns
+    path; raises DownloadError when it can't be completed.
+    """
+    import requests
+    import urllib3
+    part_path = path + '.part'
+    error = None
+    for attempt in range(attempts):
+        if attempt:
+            time.sleep(min(0.5 * 2 ** attempt, 8))
+        try:
+            return _download_once(session, url, path, part_path, sha256, size, progress, timeout)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                urllib3.exceptions.HTTPError, ConnectionError, _Interrupted) as e:
+            error = e  # Try again, resuming from the .part file
+        except requests.HTTPError as e:
+            raise DownloadError(f"Download failed: {e}") from None
+    raise DownloadError(f"Download failed after {attempts} attempts: {error}")
+
+
+def _download_once(session, url, path, part_path, sha256, size, progress, timeout):
+    # Hash what an earlier attempt already downloaded
+    digest = hashlib.sha256()
+    done = 0
+    if os.path.exists(part_path):
+        with open(part_path, 'rb') as f:
+            for block in iter(lambda: f.read(MAX_CHUNK), b''):
+                digest.update(block)
+                done += len(block)
+    if size is not None and done > size:
+        os.remove(part_path)
+        raise _Interrupted("partial download is larger than the file")
+
+    headers = {'Accept': 'application/octet-stream'}
+    if done:
+        headers['Range'] = f'bytes={done}-'
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 416 and done:
+            # Nothing left to send: the .part file is either complete or stale
+            if size is None or done != size:
+                os.remove(part_path)
+                raise _Interrupted("server rejected the resume request")
+        else:
+            response.raise_for_status()
+            if done and response.status_code != 206:
+                digest = hashlib.sha256()  # Range ignored, the whole file is coming again
+                done = 0
+            length = response.headers.get('Content-Length')
+            total = size if size is not None else (done + int(length) if length else 0)
+            chunk_size = FIRST_CHUNK
+            with open(part_path, 'ab' if done else 'wb') as f:
+                while True:
+                    started = time.monotonic()
+                    data = response.raw.read(chunk_size, decode_content=True)
+                    if not data:
+                        break
+                    f.write(data)
+                    digest.update(data)
+                    done += len(data)
+                    if progress is not None:
+                        progress.publish(done, total)
+                    elapsed = time.monotonic() - started
+                    if elapsed < FAST_READ and chunk_size < MAX_CHUNK:
+                        chunk_size *= 2
+                    elif elapsed > SLOW_READ and chunk_size > MIN_CHUNK:
+                        chunk_size //= 2
+            if size is not None and done < size:
+                raise _Interrupted(f"connection closed after {done} of {size} bytes")
+
+    if sha256 and digest.hexdigest() != sha256.lower():
+        os.remove(part_path)  # Corrupt, don't resume from it
+        raise DownloadError("Downloaded file failed its SHA-256 check")
+    os.replace(part_path, path)
+    return path
+
+
+def parse_version(tag):
+    """Turns a tag like 'v1.10.2' into (1, 10, 2) so versions compare numerically."""
+    return tuple(int(part) for part in re.findall(r'\d+', tag))
+
+
+class UpdateChecker:
+    """Looks up the latest release, at most once per `ttl` seconds.
+
+    The release JSON is cached on disk together with its ETag. Within the
+    TTL the cache is used without any request; after it, the request is
+    conditional (If-None-Match), so an unchanged release costs a 304 with
+    no body. One response serves both the version check and the installer
+    lookup. api_url can point at any server returning GitHub's "latest
+    release" JSON (e.g. a local test server).
+    """
+
+    def __init__(self, api_url, cache_file=None, ttl=CACHE_TTL, timeout=CHECK_TIMEOUT):
+        self.api_url = api_url
+        self.cache_file = cache_file or default_cache_file()
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = None  # requests.Session, created on first use
+        self._cache = None  # {'etag', 'fetched_at', 'release'}, loaded on first use
+        self._lock = threading.Lock()
+        # Result of check_in_background()
+        self.done = False
+        self.available = False
+
+    def _get_session(self):
+        if self.session is None:
+            # Network code is only loaded when updates are actually checked
+            import requests
+            self.session = requests.Session()
+            self.session.headers['Accept'] = 'application/vnd.github+json'
+            self.session.headers['User-Agent'] = f'Autotyper/{VERSION}'
+        return self.session
+
+    def _load_cache(self):
+        if self._cache is None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+                self._cache['release']['tag_name']  # Check it has the expected shape
+            except (OSError, ValueError, KeyError, TypeError):
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self, cache):
+        self._cache = cache
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_path = self.cache_file + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            print(f"Could not cache release info: {e}")
+
+    def latest_release(self, force=False):
+        """Returns the latest release's JSON (a dict), or None if it can't be found out.
+
+        Uses the cache while it is younger than the TTL (unless force).
+        If the server can't be reached, a stale cached release is returned.
+        """
+        with self._lock:
+            cache = self._load_cache()
+            release = cache.get('release')
+            if release and not force and time.time() - cache.get('fetched_at', 0) < self.ttl:
+                return release
+
+            import requests
+            headers = {}
+            if release and cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
+            try:
+                response = self._get_session().get(self.api_url, headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and release:
+                    self._save_cache(dict(cache, fetched_at=time.time()))
+                    return release
+                response.raise_for_status()
+                release = response.json()
+                release['tag_name']
+            except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+                print(f"Could not check for updates: {e}")
+                return cache.get('release')
+            self._save_cache({'etag': response.headers.get('ETag'), 'fetched_at': time.time(), 'release': release})
+            return release
+
+    def latest_version(self):
+        """Returns the latest release's tag (e.g. 'v1.4.0'), or None."""
+        release = self.latest_release()
+        return release['tag_name'] if release else None
+
+    def is_update_available(self):
+        latest_version = self.latest_version()
+        if latest_version:
+            return parse_version(latest_version) > parse_version(VERSION)
+        return False
+
+    def installer_asset(self):
+        """Returns the latest release's installer asset (a dict with 'name',
+        'browser_download_url', 'size' and maybe 'digest'), or None."""
+        release = self.latest_release()
+        if not release:
+            return None
+        for asset in release.get('assets', ()):
+            if asset['name'].endswith('.exe'):
+                return asset
+        return None
+
+    def download_installer(self, directory=None, progress=None):
+        """Downloads the latest release's installer (see download()) and returns its path.
+
+        It goes into `directory` (by default next to the cache file),
+        reusing this checker's connection pool, and is checked against the
+        SHA-256 digest the release lists for it, when there is one.
+        """
+        asset = self.installer_asset()
+        if asset is None:
+            raise DownloadError("No installer found in latest release.")
+        digest = asset.get('digest') or ''
+        sha256 = digest[len('sha256:'):] if digest.startswith('sha256:') else None
+        directory = directory or os.path.dirname(self.cache_file)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"AutotyperSetup-{self.latest_version()}.exe")
+        return download(self._get_session(), asset['browser_download_url'], path, sha256,
+                        asset.get('size'), progress)
+
+    def check_in_background(self):
+        """Runs is_update_available() on a daemon thread.
+
+        Poll `done`; `available` holds the answer once it is True. Nothing
+        here waits on the network in the caller's thread.
+        """
+        self.done = False
+        self.available = False
+
+        def run():
+            try:
+                self.available = self.is_update_available()
+            finally:
+                self.done = True
+
+        threading.Thread(target=run, daemon=True).start()
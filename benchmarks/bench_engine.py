@@ -0,0 +1,204 @@
+# benchmarks/bench_engine.py
+"""Benchmarks the typing engine, the planner, the ETA model and settings access.
+
+Keystrokes go to a null or recording backend, so no input session is
+needed and it runs on a headless CI box. Results are written as JSON so
+runs can be compared. Run from the repository root:
+
+    python -m benchmarks.bench_engine --output bench.json
+    python -m benchmarks.bench_engine --quick
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+
+try:
+    import numpy as np
+except ImportError:  # Only the pure Python planner is benchmarked without it
+    np = None
+
+from autotyper.autotyper import Autotyper
+from autotyper.backends import NullBackend, RecordingBackend
+from autotyper.eta import DelayModel
+from autotyper.instrument import Instrumentation
+from autotyper.planner import KeystrokePlanner
+from autotyper.settings import Settings
+
+from .control_latency import measure as measure_control_latency
+
+SAMPLE = ("The quick brown fox jumps over the lazy dog. Pack my box with five dozen "
+          "liquor jugs!\nHow vexingly quick daft zebras jump, said Jim, twice.\n")
+
+ETA_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUICK_ETA_SIZES = (1_000, 10_000, 100_000)
+
+
+def make_text(size):
+    """Returns `size` characters of English-like text."""
+    repeats = size // len(SAMPLE) + 1
+    return (SAMPLE * repeats)[:size]
+
+
+def make_settings(directory, zero_delays=False):
+    """Returns Settings backed by a scratch config file (the real one is never touched)."""
+    settings = Settings(os.path.join(directory, 'config.ini'))
+    if zero_delays:
+        for option in settings.defaults['Typing']:
+            if option.endswith('_min') or option.endswith('_max'):
+                settings.set_setting('Typing', option, 0)
+        settings.set_setting('Typing', 'break_frequency', 10 ** 9)
+    return settings
+
+
+def bench_engine_overhead(directory, chars, instrumented=False, seed=0):
+    """Measures planning and execution cost per keystroke with every delay at zero."""
+    autotyper = Autotyper(make_settings(directory, zero_delays=True), NullBackend(), seed=seed)
+    if instrumented:
+        autotyper.instrumentation = Instrumentation()
+    text = make_text(chars)
+    autotyper.calculate_typing_speed(10 ** 9)  # Character delays of ~0
+
+    start = time.perf_counter()
+    plan = autotyper.plan_keystrokes(text)
+    planning = time.perf_counter() - start
+
+    start = time.perf_counter()
+    autotyper.execute_plan(plan, text)
+    executing = time.perf_counter() - start
+
+    steps = len(plan)
+    return {
+        'instrumented': instrumented,
+        'chars': chars,
+        'steps': steps,
+        'plan_us_per_char': planning / chars * 1e6,
+        'execute_us_per_step': executing / steps * 1e6,
+        'total_us_per_char': (planning + executing) / chars * 1e6,
+    }
+
+
+def bench_planner(directory, chars, seed=0):
+    """Compares the pure Python planner with the NumPy one (when NumPy is installed)."""
+    settings = make_settings(directory)
+    autotyper = Autotyper(settings, NullBackend(), seed=seed)
+    autotyper.calculate_typing_speed(100)
+    text = make_text(chars)
+    results = []
+    for use_numpy in (False, True) if np is not None else (False,):
+        planner = KeystrokePlanner(autotyper.get_nearby_char, autotyper.vowels, autotyper.punctuation,
+                                   use_numpy, seed)
+        start = time.perf_counter()
+        steps = sum(len(chunk) for chunk in planner.plan_chunks(text, autotyper.typing_speed, autotyper.config))
+        planning = time.perf_counter() - start
+        results.append({
+            'numpy': use_numpy,
+            'chars': chars,
+            'steps': steps,
+            'plan_ms': planning * 1000,
+            'plan_us_per_char': planning / chars * 1e6,
+        })
+    return results
+
+
+def bench_eta(directory, sizes):
+    """Measures how long counting and estimating take as the text grows."""
+    settings = make_settings(directory)
+    config = settings.snapshot()
+    autotyper = Autotyper(settings, NullBackend())
+    results = []
+    for size in sizes:
+        text = make_text(size)
+        model = DelayModel(autotyper.vowels, autotyper.punctuation)
+        start = time.perf_counter()
+        model.count(text)
+        counting = time.perf_counter() - start
+        estimate = timeit.Timer(lambda: model.estimate(config, 0.2)).timeit(1000) / 1000
+        results.append({
+            'chars': size,
+            'count_ms': counting * 1000,
+            'estimate_us': estimate * 1e6,
+        })
+    return results
+
+
+def bench_settings(directory, number=100_000):
+    """Compares configparser lookups with snapshot attribute reads."""
+    settings = make_settings(directory)
+    config = settings.snapshot()
+    get_setting = timeit.Timer(lambda: settings.get_setting('Typing', 'word_pause_min')).timeit(number)
+    attribute = timeit.Timer(lambda: config.word_pause_min).timeit(number)
+    return {
+        'get_setting_ns': get_setting / number * 1e9,
+        'snapshot_attribute_ns': attribute / number * 1e9,
+    }
+
+
+def bench_jitter(directory, wpm, chars, precise, seed=0):
+    """Types in real time into a recording backend and reports the timing error."""
+    settings = make_settings(directory)
+    settings.set_setting('Typing', 'precise_timing', precise)
+    settings.set_setting('Typing', 'break_frequency', 10 ** 9)
+    backend = RecordingBackend()
+    autotyper = Autotyper(settings, backend, seed=seed)
+    text = make_text(chars)
+
+    start = time.monotonic()
+    autotyper.start_typing(text, 0, wpm, None)
+    elapsed = time.monotonic() - start
+
+    report = autotyper.scheduler.report()
+    report.update({
+        'wpm': wpm,
+        'precise_timing': precise,
+        'chars': chars,
+        'events': len(backend.events),
+        'planned_seconds': autotyper.planned_elapsed,
+        'elapsed_seconds': elapsed,
+    })
+    return report
+
+
+def run(quick=False, seed=0):
+    with tempfile.TemporaryDirectory() as directory:
+        return {
+            'meta': {
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'quick': quick,
+                'seed': seed,
+                'numpy': np.__version__ if np is not None else None,
+            },
+            'engine_overhead': [bench_engine_overhead(directory, 10_000 if quick else 200_000, instrumented, seed)
+                                for instrumented in (False, True)],
+            'planner': bench_planner(directory, 100_000 if quick else 1_000_000, seed),
+            'eta': bench_eta(directory, QUICK_ETA_SIZES if quick else ETA_SIZES),
+            'settings_access': bench_settings(directory),
+            'jitter': [bench_jitter(directory, 200, 60 if quick else 300, precise, seed)
+                       for precise in (False, True)],
+            'control_latency': measure_control_latency(10 if quick else 100),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--quick', action='store_true', help="smaller inputs, for a fast smoke run")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = json.dumps(run(args.quick, args.seed), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+# benchmarks/check_updates.py
+"""Checks the update code against a local HTTP server (no network needed).
+
+The server plays GitHub's "latest release" endpoint and serves an
+installer, so the release cache, the conditional (ETag) requests, the
+TTL, the fallback to a stale cache when the server is down or slow, and
+resuming, restarting and verifying downloads can all be seen working.
+Needs `requests`. Run from the repository root:
+
+    python -m benchmarks.check_updates
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from autotyper.progress import ProgressChannel
+from autotyper.updates import DownloadError, UpdateChecker, download
+
+
+class ReleaseServer:
+    """A local server for a release JSON and an installer, counting the requests it gets.
+
+    `mode` is 'ok', 'down' (answers 500) or 'slow' (answers after `delay`
+    seconds). The installer (`payload`) is served with Range support
+    unless `honor_range` is False; the next `drops` downloads of it are
+    cut off after `drop_after` bytes.
+    """
+
+    def __init__(self):
+        self.release = None
+        self.etag = None
+        self.mode = 'ok'
+        self.delay = 0.0
+        self.requests = []  # (path, status) of every request
+        self.payload = b''
+        self.honor_range = True
+        self.drops = 0
+        self.drop_after = 0
+        self.ranges = []  # Range header of every installer request (None without one)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Keep the output to the check results
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def publish(self, tag, assets=()):
+        self.release = {'tag_name': tag, 'assets': list(assets)}
+        self.etag = f'"{tag}"'
+
+    def handle(self, request):
+        if request.path == '/installer.exe':
+            return self.send_installer(request)
+        if self.mode == 'slow':
+            time.sleep(self.delay)
+        if self.mode == 'down':
+            status, body = 500, b''
+        elif request.headers.get('If-None-Match') == self.etag:
+            status, body = 304, b''
+        else:
+            status, body = 200, json.dumps(self.release).encode()
+        self.requests.append((request.path, status))
+        request.send_response(status)
+        if status == 200:
+            request.send_header('ETag', self.etag)
+            request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        try:
+            request.wfile.write(body)
+        except BrokenPipeError:
+            pass  # A 'slow' answer after the client gave up
+
+    def send_installer(self, request):
+        payload = self.payload
+        header = request.headers.get('Range')
+        self.ranges.append(header)
+        start = 0
+        if header and self.honor_range:
+            start = int(header[len('bytes='):].split('-')[0])
+            if start >= len(payload):
+                self.requests.append((request.path, 416))
+                request.send_response(416)
+                request.send_header('Content-Length', '0')
+                request.end_headers()
+                return
+        body = payload[start:]
+        status = 206 if start else 200
+        self.requests.append((request.path, status))
+        request.send_response(status)
+        if start:
+            request.send_header('Content-Range', f'bytes {start}-{len(payload) - 1}/{len(payload)}')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        if self.drops:
+            self.drops -= 1
+            request.wfile.write(body[:self.drop_after])
+            request.wfile.flush()
+            request.close_connection = True
+            request.connection.shutdown(2)  # Cut off mid-download
+            return
+        request.wfile.write(body)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def check_release_cache(server, directory):
+    """Yields (description, passed) for the release lookups of UpdateChecker."""
+    api_url = server.url + '/releases/latest'
+    cache_file = os.path.join(directory, 'latest_release.json')
+    server.publish('v999.0.0')
+
+    checker = UpdateChecker(api_url, cache_file, ttl=3600, timeout=1)
+    yield "first lookup asks the server", (checker.latest_version() == 'v999.0.0'
+                                           and server.requests == [('/releases/latest', 200)])
+    yield "a newer release is an update", checker.is_update_available()
+    yield "lookups within the TTL make no request", (checker.latest_version() == 'v999.0.0'
+                                                     and len(server.requests) == 1)
+
+    restarted = UpdateChecker(api_url, cache_file, ttl=3600, timeout=1)
+    yield "the cache survives a restart", (restarted.latest_version() == 'v999.0.0'
+                                           and len(server.requests) == 1)
+
+    expired = UpdateChecker(api_url, cache_file, ttl=0, timeout=1)
+    yield "after the TTL an unchanged release costs a 304", (expired.latest_version() == 'v999.0.0'
+                                                             and server.requests[-1][1] == 304)
+
+    server.publish('v0.0.1')
+    yield "a changed release is fetched again", (expired.latest_version() == 'v0.0.1'
+                                                 and server.requests[-1][1] == 200)
+    yield "an older release is no update", not expired.is_update_available()
+
+    server.mode = 'down'
+    yield "a server error falls back to the stale cache", (expired.latest_version() == 'v0.0.1'
+                                                           and server.requests[-1][1] == 500)
+
+    server.mode = 'slow'
+    server.delay = 2.0
+    started = time.monotonic()
+    version = expired.latest_version()
+    elapsed = time.monotonic() - started
+    yield "a slow server times out to the stale cache", version == 'v0.0.1' and elapsed < 1.9
+    server.mode = 'ok'
+
+    empty = UpdateChecker(api_url, os.path.join(directory, 'missing', 'cache.json'), ttl=3600, timeout=1)
+    server.mode = 'down'
+    yield "no cache and no server means no version", empty.latest_version() is None
+    server.mode = 'ok'
+
+    background = UpdateChecker(api_url, cache_file, ttl=3600, timeout=1)
+    background.check_in_background()
+    deadline = time.monotonic() + 5
+    while not background.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield "the background check finishes", background.done and not background.available
+
+
+def check_downloads(server, directory):
+    """Yields (description, passed) for download() and UpdateChecker.download_installer()."""
+    import requests
+    session = requests.Session()
+    url = server.url + '/installer.exe'
+    payload = os.urandom(3 * 1024 * 1024 + 123)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    server.payload = payload
+
+    def fetch(name, **kwargs):
+        path = os.path.join(directory, name)
+        server.ranges.clear()
+        try:
+            download(session, url, path, sha256, len(payload), **kwargs)
+        except DownloadError:
+            return path, False
+        with open(path, 'rb') as f:
+            return path, f.read() == payload
+
+    path, ok = fetch('plain.exe')
+    yield "a download completes and verifies", ok and not os.path.exists(path + '.part')
+
+    server.drops, server.drop_after = 1, 1024 * 1024
+    path, ok = fetch('dropped.exe')
+    # The last chunk before the drop is incomplete and not kept, so it resumes a little earlier
+    resumed_at = int(server.ranges[-1][len('bytes='):-1]) if server.ranges[-1] else 0
+    yield "a dropped connection resumes with a Range request", (
+        ok and len(server.ranges) == 2 and 0 < resumed_at <= server.drop_after)
+
+    path = os.path.join(directory, 'later.exe')
+    with open(path + '.part', 'wb') as f:
+        f.write(payload[:2 * 1024 * 1024])  # Left over from an earlier run
+    path, ok = fetch('later.exe')
+    yield "a .part file from an earlier run is resumed", ok and server.ranges == [f'bytes={2 * 1024 * 1024}-']
+
+    server.honor_range = False
+    with open(path + '.part', 'wb') as f:
+        f.write(payload[:1024])
+    os.remove(path)
+    path, ok = fetch('later.exe')
+    yield "a server ignoring Range restarts the download", ok
+    server.honor_range = True
+
+    server.payload = payload[:-1] + bytes([payload[-1] ^ 0xFF])
+    path, ok = fetch('corrupt.exe', attempts=1)
+    yield "a checksum mismatch fails and drops the .part file", (
+        not ok and not os.path.exists(path) and not os.path.exists(path + '.part'))
+    server.payload = payload
+
+    server.publish('v999.0.0', [{'name': 'AutotyperSetup.exe', 'browser_download_url': url,
+                                 'size': len(payload), 'digest': f'sha256:{sha256}'}])
+    checker = UpdateChecker(server.url + '/releases/latest', os.path.join(directory, 'release.json'), timeout=1)
+    channel = ProgressChannel()
+    path = checker.download_installer(os.path.join(directory, 'installer'), channel)
+    with open(path, 'rb') as f:
+        ok = f.read() == payload
+    yield "the release's installer downloads with progress", ok and channel.poll() == (len(payload), len(payload))
+
+
+def run():
+    """Runs every check, printing one line each. Returns the number of failures."""
+    failures = 0
+    server = ReleaseServer()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for checks in (check_release_cache, check_downloads):
+                for description, passed in checks(server, directory):
+                    print(f"{'ok  ' if passed else 'FAIL'}  {description}")
+                    failures += not passed
+    finally:
+        server.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+    sys.exit(1 if run() else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/control_latency.py
+"""Measures how quickly pause, resume and cancel reach the typing thread.
+
+A worker thread sits in the middle of a long wait (like a break), the main
+thread flips the control state, and the time until the worker wakes up is
+recorded. Run from the repository root:
+
+    python -m benchmarks.control_latency --trials 200
+"""
+import argparse
+import json
+import threading
+import time
+
+from autotyper.control import TypingControl
+from autotyper.timing import DeadlineScheduler
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    count = len(samples)
+    return {
+        'samples': count,
+        'p50_ms': samples[count // 2] * 1000,
+        'p99_ms': samples[min(count - 1, int(count * 0.99))] * 1000,
+        'max_ms': samples[-1] * 1000,
+    }
+
+
+def measure(trials=100, settle=0.005):
+    """Returns latency percentiles for pause, resume and cancel."""
+    latencies = {'pause': [], 'resume': [], 'cancel': []}
+
+    for _ in range(trials):
+        control = TypingControl()
+        scheduler = DeadlineScheduler(sleep=control.sleep)
+        woke = {}
+
+        def worker():
+            scheduler.start()
+            if not scheduler.wait(60):  # A "break" far longer than the test
+                woke['pause'] = time.perf_counter()
+                if control.wait_while_paused():
+                    woke['resume'] = time.perf_counter()
+                    scheduler.wait(60)
+                    woke['cancel'] = time.perf_counter()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        time.sleep(settle)  # Let the worker block
+
+        sent = time.perf_counter()
+        control.pause()
+        while 'pause' not in woke:
+            time.sleep(0)
+        latencies['pause'].append(woke['pause'] - sent)
+        time.sleep(settle)
+
+        sent = time.perf_counter()
+        control.resume()
+        while 'resume' not in woke:
+            time.sleep(0)
+        latencies['resume'].append(woke['resume'] - sent)
+        time.sleep(settle)
+
+        sent = time.perf_counter()
+        control.cancel()
+        thread.join(5)
+        latencies['cancel'].append(woke['cancel'] - sent)
+
+    return {name: _percentiles(samples) for name, samples in latencies.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.trials), indent=2))
+
+
+if __name__ == '__main__':
+    main()